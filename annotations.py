@@ -15,10 +15,22 @@ class TextAnnotation:
     font_face: int = cv2.FONT_HERSHEY_SIMPLEX
     background_color: Optional[Tuple[int, int, int]] = None
     timestamp: float = None
+    start_time: Optional[float] = None  # Seconds into the video; None shows from the start
+    end_time: Optional[float] = None    # None shows until the end
     
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = time.time()
+            
+    def is_active(self, at_time: Optional[float]) -> bool:
+        """Check whether the annotation is shown at the given video time."""
+        if at_time is None:
+            return True
+        if self.start_time is not None and at_time < self.start_time:
+            return False
+        if self.end_time is not None and at_time >= self.end_time:
+            return False
+        return True
 
 class AnnotationManager:
     def __init__(self):
@@ -29,7 +41,8 @@ class AnnotationManager:
     def add_annotation(self, text: str, position: Tuple[int, int], 
                       color: Tuple[int, int, int] = (255, 255, 255),
                       font_scale: float = 1.0, thickness: int = 2,
-                      background_color: Optional[Tuple[int, int, int]] = None):
+                      background_color: Optional[Tuple[int, int, int]] = None,
+                      start_time: Optional[float] = None, end_time: Optional[float] = None):
         """Add a new text annotation.
         
         Args:
@@ -39,6 +52,8 @@ class AnnotationManager:
             font_scale: Scale factor for the font
             thickness: Thickness of the text
             background_color: Optional RGB color tuple for text background
+            start_time: Optional time in seconds from which the text is shown
+            end_time: Optional time in seconds until which the text is shown
         """
         annotation = TextAnnotation(
             text=text,
@@ -46,7 +61,9 @@ class AnnotationManager:
             color=color,
             font_scale=font_scale,
             thickness=thickness,
-            background_color=background_color
+            background_color=background_color,
+            start_time=start_time,
+            end_time=end_time
         )
         self.annotations.append(annotation)
         
@@ -59,11 +76,13 @@ class AnnotationManager:
         """Remove all annotations."""
         self.annotations.clear()
         
-    def draw_annotations(self, frame: np.ndarray) -> np.ndarray:
+    def draw_annotations(self, frame: np.ndarray, at_time: Optional[float] = None) -> np.ndarray:
         """Draw all annotations on a frame.
         
         Args:
             frame: Input frame to draw on
+            at_time: Optional video time of the frame; only annotations active
+                at that time are drawn
             
         Returns:
             Frame with annotations drawn
@@ -71,6 +90,9 @@ class AnnotationManager:
         annotated_frame = frame.copy()
         
         for annotation in self.annotations:
+            if not annotation.is_active(at_time):
+                continue
+                
             # Get text size for background rectangle if needed
             (text_width, text_height), baseline = cv2.getTextSize(
                 annotation.text,
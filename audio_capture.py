@@ -1,23 +1,90 @@
 import sounddevice as sd
 import numpy as np
-import wave
 import tempfile
 import os
+import queue
+import threading
+import time
 from threading import Lock
+from typing import Optional
+from audio_encoding import AudioEncoder, AUDIO_CODECS
+from loudness import LoudnessMeter
+from silence_detection import SilenceDetector
+from level_meter import LevelMeter
+from waveform import WaveformBuilder
+from audio_devices import get_device_registry
+from utils.wav_utils import SAMPLE_FORMATS, write_wav, convert_samples
+from resampler import PolyphaseResampler
+from noise_suppression import NoiseSuppressor, SUPPRESSION_MODES
+
+# Seconds without a callback before the stream is treated as lost
+STREAM_STALL_TIMEOUT = 1.0
 
 class AudioRecorder:
-    def __init__(self, sample_rate=44100):
+    def __init__(self, sample_rate=44100, encoder_codec=None, measure_loudness=False,
+                 detect_silence=False, device=None, sample_format="float32",
+                 native_rate=True, noise_suppression=None, build_waveform=False):
         """Initialize audio recorder.
         
         Args:
-            sample_rate: Audio sample rate in Hz
+            sample_rate: Output audio sample rate in Hz
+            encoder_codec: Optional codec ("aac" or "opus") to compress audio
+                live during capture instead of buffering raw PCM
+            measure_loudness: Whether to compute EBU R128 loudness statistics
+                while capturing
+            detect_silence: Whether to track per-frame audio activity for
+                dead-air trimming
+            device: Input device index or name (None for the default input)
+            sample_format: Capture format ("int16", "int24" or "float32"), kept
+                through buffering and writing
+            native_rate: Open the device at its native sample rate and resample
+                to sample_rate on the consumer thread, instead of letting the
+                driver resample
+            noise_suppression: Optional noise filter ("subtract" or "gate") that
+                learns the noise profile during the first second
+            build_waveform: Whether to build a min/max/RMS waveform pyramid
+                while capturing
         """
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+        if noise_suppression is not None and noise_suppression not in SUPPRESSION_MODES:
+            raise ValueError(f"Unsupported noise suppression mode: {noise_suppression}")
+
         self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.dtype = np.dtype(SAMPLE_FORMATS[sample_format]["dtype"])
+        self.native_rate = native_rate
+        self.capture_rate = sample_rate
+        self._resampler = None
+        self.device = device
+        self.device_registry = get_device_registry()
+        self.channels = 2
+        self.encoder_codec = encoder_codec
+        self.measure_loudness = measure_loudness
+        self.loudness_meter = None
+        self.loudness = None
+        self.detect_silence = detect_silence
+        self.silence_detector = None
+        self.level_meter = None
+        self.noise_suppression = noise_suppression
+        self.noise_suppressor = None
+        self.build_waveform = build_waveform
+        self.waveform_builder = None
+        self.waveform = None
         self.recording = False
         self.audio_data = []
         self.stream = None
         self.audio_lock = Lock()
         self.temp_dir = tempfile.mkdtemp()
+        self.encoder = None
+        self.encoded_path = None
+        self._block_queue = queue.Queue()
+        self._consumer_thread = None
+        self._stream_lost = threading.Event()
+        self._active_device_name = None
+        self._capture_start = None
+        self._last_block_time = None
+        self._samples_received = 0
         
     def start_recording(self, channels=2):
         """Start audio recording.
@@ -29,49 +96,309 @@ class AudioRecorder:
             return
             
         self.recording = True
+        self.channels = channels
         self.audio_data = []
-        
-        def callback(indata, frames, time, status):
-            if status:
-                print(f'Audio recording error: {status}')
-            if self.recording:
-                with self.audio_lock:
-                    self.audio_data.append(indata.copy())
+        self.encoded_path = None
+        self.loudness = None
+        self.silence_detector = None
+        self.waveform = None
+        self._stream_lost.clear()
+        self._samples_received = 0
         
         try:
-            # Test audio device availability first
-            devices = sd.query_devices()
-            if not any(device['max_input_channels'] > 0 for device in devices):
+            # Test audio device availability first (cached)
+            if not self.device_registry.has_input_devices():
                 raise RuntimeError("No audio input devices found")
 
-            self.stream = sd.InputStream(
-                channels=channels,
-                samplerate=self.sample_rate,
-                callback=callback,
-                blocksize=2048,  # Optimize buffer size
-                latency='low'    # Reduce latency
+            if self.encoder_codec:
+                extension = AUDIO_CODECS[self.encoder_codec]["extension"]
+                self.encoder = AudioEncoder(
+                    os.path.join(self.temp_dir, f"temp_audio.{extension}"),
+                    codec=self.encoder_codec,
+                    sample_rate=self.sample_rate,
+                    channels=channels,
+                    dtype=self.dtype
+                )
+                self.encoder.start()
+
+            if self.measure_loudness:
+                self.loudness_meter = LoudnessMeter(self.sample_rate, channels)
+
+            if self.detect_silence:
+                self.silence_detector = SilenceDetector(self.sample_rate)
+
+            self.level_meter = LevelMeter(self.sample_rate, channels)
+
+            if self.build_waveform:
+                self.waveform_builder = WaveformBuilder(self.sample_rate, channels)
+
+            self.noise_suppressor = None
+            if self.noise_suppression:
+                self.noise_suppressor = NoiseSuppressor(self.sample_rate, channels, mode=self.noise_suppression)
+
+            self._consumer_thread = threading.Thread(
+                target=self._consume_blocks,
+                name="AudioRecorder-Consumer",
+                daemon=True
             )
-            self.stream.start()
+            self._capture_start = time.monotonic()
+            self._last_block_time = self._capture_start
+            self._open_stream(self.device)
+            self._consumer_thread.start()
         except Exception as e:
             self.recording = False
+            self._stop_consumer()
             raise RuntimeError(f"Audio recording error: {str(e)}")
         
+    def _audio_callback(self, indata, frames, time_info, status):
+        if status:
+            print(f'Audio recording error: {status}')
+        if self.recording:
+            # Hand the block off; all processing happens on the consumer thread
+            self._block_queue.put(indata.copy())
+
+    def _on_stream_finished(self):
+        """Called by PortAudio when the stream ends, e.g. because the device vanished."""
+        if self.recording:
+            self._stream_lost.set()
+
+    def _device_rate(self, device) -> int:
+        """Get the native sample rate of a device from the registry cache."""
+        if device is None:
+            info = self.device_registry.default_input()
+        elif isinstance(device, int):
+            info = self.device_registry.devices()[device]
+        else:
+            info = next((d for d in self.device_registry.input_devices() if d['name'] == device), None)
+        if not info or not info.get('default_samplerate'):
+            return self.sample_rate
+        return int(info['default_samplerate'])
+
+    def _open_stream(self, device):
+        """Open and start an input stream on the given device."""
+        self.capture_rate = self._device_rate(device) if self.native_rate else self.sample_rate
+        self._resampler = None
+        if self.capture_rate != self.sample_rate:
+            self._resampler = PolyphaseResampler(self.capture_rate, self.sample_rate, self.channels)
+
+        self.device_registry.acquire_stream()
+        stream = None
+        try:
+            stream = sd.InputStream(
+                device=device,
+                channels=self.channels,
+                samplerate=self.capture_rate,
+                dtype=self.dtype.name,
+                callback=self._audio_callback,
+                finished_callback=self._on_stream_finished,
+                blocksize=2048,  # Optimize buffer size
+                latency='low'    # Reduce latency
+            )
+            stream.start()
+        except Exception:
+            if stream:
+                stream.close()
+            self.device_registry.release_stream()
+            raise
+        self.stream = stream
+        self._active_device_name = self.device_registry.devices()[self.stream.device]['name']
+
+    def _close_stream(self):
+        """Stop and close the current input stream, if any."""
+        stream, self.stream = self.stream, None
+        if stream:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                print(f"Audio recording error: {e}")
+            finally:
+                self.device_registry.release_stream()
+
+    def _reopen_stream(self):
+        """Move capture to a replacement device without interrupting the recording.
+
+        The time during which no device delivered audio is filled with
+        silence so the audio stays in sync with the video.
+        """
+        print("Audio device lost, reopening stream")
+        self._close_stream()
+        self._stream_lost.clear()
+
+        device = self.device_registry.find_replacement(self._active_device_name)
+        if device is None:
+            # Retry on the next stall check
+            self._last_block_time = time.monotonic()
+            return
+        try:
+            self._open_stream(device['index'])
+        except Exception as e:
+            print(f"Audio recording error: {e}")
+        self._last_block_time = time.monotonic()
+        self._fill_gap()
+
+    def _fill_gap(self, until: Optional[float] = None):
+        """Insert silence for the samples missed while no stream was running.
+
+        Args:
+            until: Monotonic time the audio should reach (defaults to now)
+        """
+        until = time.monotonic() if until is None else until
+        expected = int((until - self._capture_start) * self.sample_rate)
+        missing = expected - self._samples_received
+        while missing > 0:
+            frames = min(missing, self.sample_rate)
+            self._process_block(np.zeros((frames, self.channels), dtype=self.dtype))
+            missing -= frames
+        
+    def _consume_blocks(self):
+        """Drain captured blocks until recording stops and the queue is empty."""
+        while self.recording or not self._block_queue.empty():
+            try:
+                block = self._block_queue.get(timeout=0.1)
+            except queue.Empty:
+                stalled = time.monotonic() - self._last_block_time > STREAM_STALL_TIMEOUT
+                if self.recording and (self._stream_lost.is_set() or stalled):
+                    self._reopen_stream()
+                continue
+            self._last_block_time = time.monotonic()
+            self._process_block(self._filter_block(block))
+
+        self._flush_filters()
+
+    def _filter_block(self, block):
+        """Run a block through the float stages: resampling, then noise suppression."""
+        if not self._resampler and not self.noise_suppressor:
+            return block
+        samples = convert_samples(block, np.float32)
+        if self._resampler:
+            samples = self._resampler.process(samples)
+        if self.noise_suppressor:
+            samples = self.noise_suppressor.process(samples)
+        return convert_samples(samples, self.dtype)
+
+    def _flush_filters(self):
+        """Push out the samples still held in filter stage buffers."""
+        tail = np.zeros((0, self.channels), dtype=np.float32)
+        if self._resampler:
+            tail = self._resampler.flush()
+        if self.noise_suppressor:
+            tail = np.concatenate([self.noise_suppressor.process(tail), self.noise_suppressor.flush()])
+        if len(tail):
+            self._process_block(convert_samples(tail, self.dtype))
+
+    def _process_block(self, block):
+        """Analyze one captured block and route it to the encoder or the in-memory buffer."""
+        self._samples_received += len(block)
+        if self.level_meter:
+            self.level_meter.process(block)
+        if self.loudness_meter:
+            self.loudness_meter.process(block)
+        if self.silence_detector:
+            self.silence_detector.process(block)
+        if self.waveform_builder:
+            self.waveform_builder.process(block)
+
+        if self.encoder:
+            try:
+                self.encoder.write(block)
+                return
+            except RuntimeError as e:
+                print(f"Audio encoding error: {e}")
+                self._fall_back_to_memory()
+
+        with self.audio_lock:
+            self.audio_data.append(block)
+
+    def _fall_back_to_memory(self):
+        """Drop a failed encoder and keep the rest of the recording in memory.
+
+        The samples already encoded are lost with the encoder, so silence takes
+        their place and the saved audio still starts with the video.
+        """
+        encoder, self.encoder = self.encoder, None
+        try:
+            encoder.close()
+        except RuntimeError:
+            pass
+        if os.path.exists(encoder.output_path):
+            os.remove(encoder.output_path)
+        with self.audio_lock:
+            self.audio_data.append(np.zeros((encoder.samples_written, self.channels), dtype=self.dtype))
+
+    def _stop_consumer(self, pad_until: Optional[float] = None):
+        """Wait for the consumer thread and finalize the encoder, if any.
+
+        Args:
+            pad_until: Monotonic stop time to pad the audio up to with silence,
+                when the stream was lost and never replaced
+        """
+        if self._consumer_thread and self._consumer_thread.is_alive():
+            self._consumer_thread.join()
+        self._consumer_thread = None
+        self.encoded_path = None
+        if pad_until is not None:
+            self._fill_gap(pad_until)
+
+        self.level_meter = None
+
+        if self.loudness_meter:
+            self.loudness = self.loudness_meter.result()
+            self.loudness_meter = None
+
+        if self.waveform_builder:
+            self.waveform = self.waveform_builder.finish()
+            self.waveform_builder = None
+
+        if self.encoder:
+            encoder, self.encoder = self.encoder, None
+            try:
+                self.encoded_path = encoder.close()
+            except RuntimeError as e:
+                print(f"Audio encoding error: {e}")
+
     def stop_recording(self):
-        """Stop audio recording and return the recorded audio data."""
+        """Stop audio recording and return the recorded audio data.
+
+        When live encoding is enabled the compressed file is available in
+        ``encoded_path`` and no raw audio is returned. If the encoder fails
+        mid-recording, raw audio is returned instead, with silence in place
+        of the part that was encoded. Loudness statistics,
+        when measured, are available in ``loudness`` and the waveform
+        pyramid, when built, in ``waveform``.
+        """
         self.recording = False
-        if self.stream:
-            self.stream.stop()
-            self.stream.close()
-            self.stream = None
+        # A lost stream that found no replacement leaves a gap up to the stop
+        stop_time = time.monotonic()
+        stream_lost = self.stream is None or self._stream_lost.is_set()
+        self._close_stream()
+
+        self._stop_consumer(pad_until=stop_time if stream_lost else None)
         
         with self.audio_lock:
             if self.audio_data:
                 return np.concatenate(self.audio_data, axis=0)
         return None
         
+    def get_filter_metrics(self):
+        """Get CPU cost metrics of the noise suppression stage, or None if disabled."""
+        suppressor = self.noise_suppressor
+        return suppressor.metrics() if suppressor else None
+
+    def get_levels(self):
+        """Get the latest peak/RMS levels, or None when not recording.
+
+        Safe to call from any thread, e.g. a GUI timer.
+        """
+        meter = self.level_meter
+        return meter.snapshot() if meter else None
+        
     def save_audio(self, audio_data, output_path):
         """Save recorded audio to a WAV file.
         
+        The file uses the capture sample format and the channel layout of
+        the data, so captured samples are written without conversion.
+        
         Args:
             audio_data: Numpy array of audio data
             output_path: Path to save the audio file
@@ -83,12 +410,7 @@ class AudioRecorder:
             return None
             
         temp_path = os.path.join(self.temp_dir, "temp_audio.wav")
-        
-        with wave.open(temp_path, 'wb') as wf:
-            wf.setnchannels(2)  # Stereo
-            wf.setsampwidth(2)  # 2 bytes per sample
-            wf.setframerate(self.sample_rate)
-            wf.writeframes((audio_data * 32767).astype(np.int16).tobytes())
+        write_wav(temp_path, audio_data, self.sample_rate, self.sample_format)
         
         # If output_path is provided, copy the temp file there
         if output_path:
@@ -98,4 +420,4 @@ class AudioRecorder:
         
     def get_available_devices(self):
         """Get list of available audio input devices."""
-        return sd.query_devices()
+        return self.device_registry.devices()
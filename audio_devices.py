@@ -0,0 +1,141 @@
+import sounddevice as sd
+import threading
+from threading import Lock
+from typing import Callable, List, Optional
+
+class DeviceRegistry:
+    def __init__(self, refresh_interval: float = 5.0):
+        """Initialize a cached view of the audio devices.
+
+        Querying PortAudio can take hundreds of milliseconds on some hosts, so
+        the device list is queried once and then refreshed in the background,
+        and on demand when a stream is lost and a replacement is needed.
+
+        Args:
+            refresh_interval: Seconds between background refreshes
+        """
+        self.refresh_interval = refresh_interval
+        self._lock = Lock()
+        self._devices = None
+        self._default_input = None
+        self._listeners: List[Callable[[], None]] = []
+        self._active_streams = 0
+        self._refresh_thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def active_streams(self) -> int:
+        """Number of input streams currently open on the devices."""
+        with self._lock:
+            return self._active_streams
+
+    def acquire_stream(self):
+        """Count a stream as active; call before opening it."""
+        with self._lock:
+            self._active_streams += 1
+
+    def release_stream(self):
+        """Count a stream as closed, or as never opened if opening failed."""
+        with self._lock:
+            self._active_streams = max(0, self._active_streams - 1)
+
+    def refresh(self):
+        """Query the device list again and notify listeners if it changed."""
+        devices = [dict(device) for device in sd.query_devices()]
+        try:
+            default_input = dict(sd.query_devices(kind='input'))
+        except Exception:
+            default_input = None
+
+        with self._lock:
+            changed = self._devices is not None and (
+                [d['name'] for d in devices] != [d['name'] for d in self._devices]
+            )
+            self._devices = devices
+            self._default_input = default_input
+            listeners = list(self._listeners)
+
+        if changed:
+            for listener in listeners:
+                listener()
+
+    def devices(self) -> List[dict]:
+        """Get the cached device list, querying it on first use."""
+        with self._lock:
+            devices = self._devices
+        if devices is None:
+            self.refresh()
+            with self._lock:
+                devices = self._devices
+        return devices
+
+    def default_input(self) -> Optional[dict]:
+        """Get the cached default input device and its capabilities."""
+        self.devices()
+        with self._lock:
+            return self._default_input
+
+    def input_devices(self) -> List[dict]:
+        """Get the cached devices that can record."""
+        return [d for d in self.devices() if d['max_input_channels'] > 0]
+
+    def has_input_devices(self) -> bool:
+        """Check whether any input device is available."""
+        return bool(self.input_devices())
+
+    def find_replacement(self, name: Optional[str] = None) -> Optional[dict]:
+        """Find a device to reopen a lost stream on.
+
+        Prefers a device with the same name (e.g. a re-plugged headset),
+        otherwise falls back to the default input.
+        """
+        self.refresh()
+        inputs = self.input_devices()
+        for device in inputs:
+            if name and device['name'] == name:
+                return device
+        default = self.default_input()
+        if default and default['max_input_channels'] > 0:
+            return default
+        return inputs[0] if inputs else None
+
+    def add_listener(self, listener: Callable[[], None]):
+        """Register a callback invoked when the device list changes."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def start_background_refresh(self):
+        """Start refreshing the device list periodically in a daemon thread."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def refresh_loop():
+            while not self._stop_event.wait(self.refresh_interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Audio device refresh error: {e}")
+
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(
+            target=refresh_loop,
+            name="DeviceRegistry-Refresh",
+            daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        """Stop the background refresh thread."""
+        self._stop_event.set()
+
+_registry = None
+_registry_lock = Lock()
+
+def get_device_registry() -> DeviceRegistry:
+    """Get the process-wide device registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DeviceRegistry()
+            _registry.start_background_refresh()
+        return _registry
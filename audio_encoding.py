@@ -0,0 +1,105 @@
+import ffmpeg
+import numpy as np
+from typing import Optional
+
+# Codec settings for live audio compression
+AUDIO_CODECS = {
+    "aac": {"acodec": "aac", "extension": "m4a", "bitrate": "160k"},
+    "opus": {"acodec": "libopus", "extension": "opus", "bitrate": "128k"},
+}
+
+# Raw PCM formats understood by ffmpeg, keyed by numpy sample type
+PCM_FORMATS = {
+    np.dtype(np.float32): "f32le",
+    np.dtype(np.int16): "s16le",
+    np.dtype(np.int32): "s32le",
+}
+
+class AudioEncoder:
+    def __init__(self, output_path: str, codec: str = "aac", sample_rate: int = 44100,
+                 channels: int = 2, dtype=np.float32, bitrate: Optional[str] = None):
+        """Initialize a streaming audio encoder.
+
+        Raw PCM blocks are piped to an ffmpeg process as they arrive, so the
+        compressed file is complete as soon as the capture stops.
+
+        Args:
+            output_path: Path of the compressed audio file
+            codec: Codec name, one of AUDIO_CODECS
+            sample_rate: Sample rate of the incoming blocks in Hz
+            channels: Number of channels in the incoming blocks
+            dtype: Numpy sample type of the incoming blocks
+            bitrate: Optional bitrate override (e.g. "192k")
+        """
+        if codec not in AUDIO_CODECS:
+            raise ValueError(f"Unsupported audio codec: {codec}")
+        if np.dtype(dtype) not in PCM_FORMATS:
+            raise ValueError(f"Unsupported sample type: {np.dtype(dtype)}")
+
+        self.output_path = output_path
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.bitrate = bitrate or AUDIO_CODECS[codec]["bitrate"]
+        self.process = None
+        self.samples_written = 0
+
+    def start(self):
+        """Start the encoder process."""
+        if self.process:
+            return
+
+        stream = ffmpeg.input(
+            "pipe:",
+            format=PCM_FORMATS[self.dtype],
+            ac=self.channels,
+            ar=self.sample_rate
+        ).output(
+            self.output_path,
+            acodec=AUDIO_CODECS[self.codec]["acodec"],
+            audio_bitrate=self.bitrate
+        ).global_args("-loglevel", "error", "-nostats").overwrite_output()
+
+        self.process = stream.run_async(pipe_stdin=True, pipe_stderr=True)
+
+    def write(self, block: np.ndarray):
+        """Feed a block of samples to the encoder.
+
+        Args:
+            block: Array of shape (frames, channels)
+        """
+        if not self.process:
+            raise RuntimeError("Audio encoder is not running")
+
+        try:
+            self.process.stdin.write(np.ascontiguousarray(block, dtype=self.dtype).tobytes())
+        except (BrokenPipeError, OSError) as e:
+            raise RuntimeError(f"Audio encoder stopped unexpectedly: {self._read_error() or e}")
+        self.samples_written += len(block)
+
+    def close(self) -> Optional[str]:
+        """Flush the encoder and wait for it to finish.
+
+        Returns:
+            Path to the encoded file, or None if nothing was written
+        """
+        if not self.process:
+            return None
+
+        process, self.process = self.process, None
+        try:
+            process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        error = process.stderr.read().decode(errors="replace").strip()
+        if process.wait() != 0:
+            raise RuntimeError(f"Audio encoding failed: {error}")
+
+        return self.output_path if self.samples_written else None
+
+    def _read_error(self) -> str:
+        """Read ffmpeg's error output after the process has exited."""
+        if self.process and self.process.poll() is not None:
+            return self.process.stderr.read().decode(errors="replace").strip()
+        return ""
@@ -0,0 +1,142 @@
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+from video_processing import VideoProcessor
+from proxy import proxy_sidecar_path
+
+# Chunk length of background transcodes; also how long a pause can take to apply
+BACKGROUND_CHUNK_SECONDS = 4.0
+
+@dataclass
+class TranscodeJob:
+    """A queued conversion of an intermediate recording to its final file, or a proxy."""
+    source: str
+    output_path: str
+    profile: Optional[str] = None
+    delete_source: bool = True
+    kind: str = "transcode"  # "transcode" or "proxy"
+    status: str = "queued"  # "queued", "running", "done" or "failed"
+    progress: float = 0.0
+    error: Optional[str] = None
+    finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the job to finish; returns False on timeout."""
+        return self.finished.wait(timeout)
+
+class BackgroundTranscoder:
+    def __init__(self, chunk_seconds: float = BACKGROUND_CHUNK_SECONDS):
+        """Initialize a background transcoder.
+
+        Jobs run one at a time on a daemon thread, with ffmpeg at low CPU
+        priority. pause() holds the running job at its next chunk boundary,
+        e.g. while a new recording is being captured.
+
+        Args:
+            chunk_seconds: Minimum chunk length in seconds
+        """
+        self.chunk_seconds = chunk_seconds
+        self._jobs = queue.Queue()
+        self._pending = []
+        self._lock = threading.Lock()
+        self._resume = threading.Event()
+        self._resume.set()
+        self._thread = None
+
+    @property
+    def paused(self) -> bool:
+        """Whether transcoding is paused."""
+        return not self._resume.is_set()
+
+    def pause(self):
+        """Pause transcoding at the next chunk boundary."""
+        self._resume.clear()
+
+    def resume(self):
+        """Continue transcoding."""
+        self._resume.set()
+
+    def pending_outputs(self) -> set:
+        """Get the output paths of jobs that have not finished yet."""
+        with self._lock:
+            return {job.output_path for job in self._pending}
+
+    def submit(self, source: str, output_path: str, profile: Optional[str] = None,
+               delete_source: bool = True) -> TranscodeJob:
+        """Queue a transcode.
+
+        Args:
+            source: Intermediate video file
+            output_path: Path of the final file
+            profile: Encoding profile name for the final file (None uses the default)
+            delete_source: Remove the intermediate once the final file is written
+
+        Returns:
+            The queued job
+        """
+        return self._enqueue(TranscodeJob(source, output_path, profile, delete_source))
+
+    def submit_proxy(self, source: str) -> TranscodeJob:
+        """Queue the generation of a video's editing proxy.
+
+        Proxies are encoded in one pass; a pause holds them before they start.
+
+        Args:
+            source: Video to make a proxy of (may be the output of an earlier job)
+
+        Returns:
+            The queued job
+        """
+        return self._enqueue(TranscodeJob(source, proxy_sidecar_path(source), delete_source=False, kind="proxy"))
+
+    def _enqueue(self, job: TranscodeJob) -> TranscodeJob:
+        """Queue a job and start the worker if needed."""
+        with self._lock:
+            self._pending.append(job)
+            self._jobs.put(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return job
+
+    def _run(self):
+        """Worker loop; exits once the queue stays empty."""
+        while True:
+            try:
+                job = self._jobs.get(timeout=1.0)
+            except queue.Empty:
+                with self._lock:
+                    if self._jobs.empty():
+                        self._thread = None
+                        return
+                continue
+            self._transcode(job)
+
+    def _transcode(self, job: TranscodeJob):
+        """Run one job and record its outcome."""
+        job.status = "running"
+        try:
+            processor = VideoProcessor(output_path=job.source, profile=job.profile)
+            if job.kind == "proxy":
+                self._resume.wait()
+                processor.generate_proxy(progress_callback=lambda fraction: setattr(job, "progress", fraction))
+            else:
+                processor.transcode(
+                    job.output_path,
+                    chunk_seconds=self.chunk_seconds,
+                    resume_event=self._resume,
+                    progress_callback=lambda fraction: setattr(job, "progress", fraction)
+                )
+                if job.delete_source:
+                    os.remove(job.source)
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"Error transcoding {job.source}: {e}")
+        finally:
+            with self._lock:
+                self._pending.remove(job)
+            job.finished.set()
@@ -0,0 +1,75 @@
+"""Throughput and CPU benchmark for the video encoder backends.
+
+Encodes synthetic screen content (text, a scrolling pane and a moving
+cursor) with each available backend.
+
+Run from the repository root:
+    python benchmarks/bench_encoders.py [frames] [width] [height]
+"""
+import os
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from encoders import ENCODER_BACKENDS
+
+FPS = 30.0
+
+def synthetic_screen_frames(count, width, height):
+    """Generate frames that look like a desktop: mostly static text with small changes."""
+    base = np.full((height, width, 3), 245, dtype=np.uint8)
+    cv2.rectangle(base, (0, 0), (width, 40), (60, 60, 70), -1)
+    for row in range(60, height - 20, 28):
+        cv2.putText(base, f"def function_{row}(argument): return argument * {row}",
+                    (20, row), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (30, 30, 30), 1, cv2.LINE_AA)
+
+    pane_left = width // 2
+    for index in range(count):
+        frame = base.copy()
+        # Scrolling log pane
+        scroll = (index * 4) % 28
+        for row in range(60 - scroll, height, 28):
+            cv2.putText(frame, f"[{index:05d}] log line {row}", (pane_left + 10, row),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 100, 0), 1, cv2.LINE_AA)
+        # Moving cursor
+        x = int((index * 7) % width)
+        y = int(height / 2 + np.sin(index / 15.0) * height / 4)
+        cv2.circle(frame, (x, y), 6, (200, 30, 30), -1)
+        yield frame
+
+def bench(backend, frames, width, height):
+    """Encode frames with one backend and return (fps, cpu seconds, file size)."""
+    path = os.path.join(tempfile.mkdtemp(), f"bench_{backend.name}.mp4")
+    source = list(synthetic_screen_frames(frames, width, height))
+
+    times_before = os.times()
+    start = time.perf_counter()
+    backend(path, fps=FPS).encode(iter(source))
+    elapsed = time.perf_counter() - start
+    times_after = os.times()
+
+    # Includes the ffmpeg child process for the pipe backend
+    cpu = sum(after - before for after, before in zip(times_after[:4], times_before[:4]))
+    size = os.path.getsize(path)
+    os.remove(path)
+    return frames / elapsed, cpu, size
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 1920
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 1080
+
+    print(f"{frames} frames at {width}x{height}")
+    print(f"{'backend':>8} {'fps':>8} {'cpu s':>8} {'cpu/frame ms':>13} {'size KB':>9}")
+    for backend in ENCODER_BACKENDS.values():
+        if not backend.is_available():
+            print(f"{backend.name:>8} unavailable")
+            continue
+        fps, cpu, size = bench(backend, frames, width, height)
+        print(f"{backend.name:>8} {fps:>8.1f} {cpu:>8.2f} {cpu / frames * 1000:>13.2f} {size / 1024:>9.0f}")
+
+if __name__ == "__main__":
+    main()
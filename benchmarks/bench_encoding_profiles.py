@@ -0,0 +1,71 @@
+"""Speed, size and quality benchmark for the screen-content encoding profiles.
+
+Encodes synthetic screen content with each profile through the ffmpeg pipe
+backend and decodes it again to measure PSNR against the source frames.
+The table ends with a bar chart of speed against size.
+
+Run from the repository root:
+    python benchmarks/bench_encoding_profiles.py [frames] [width] [height]
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from encoders import ENCODING_PROFILES, FFmpegPipeEncoder
+from utils.media_utils import decode_frames
+from bench_encoders import FPS, synthetic_screen_frames
+
+CHART_WIDTH = 40
+
+def psnr(source, path, width, height):
+    """Mean PSNR in dB of the decoded file against the source frames."""
+    errors = []
+    for original, decoded in zip(source, decode_frames(path, frame_size=(width, height))):
+        difference = original.astype(np.float32) - decoded.astype(np.float32)
+        errors.append(np.mean(np.square(difference)))
+    mse = max(float(np.mean(errors)), 1e-10)
+    return 10 * np.log10(255.0 ** 2 / mse)
+
+def bench(profile, source, width, height):
+    """Encode with one profile and return (fps, cpu seconds, file size, psnr)."""
+    path = os.path.join(tempfile.mkdtemp(), f"bench_{profile.name}.mp4")
+
+    times_before = os.times()
+    start = time.perf_counter()
+    FFmpegPipeEncoder(path, fps=FPS, profile=profile).encode(iter(source))
+    elapsed = time.perf_counter() - start
+    times_after = os.times()
+
+    cpu = sum(after - before for after, before in zip(times_after[:4], times_before[:4]))
+    size = os.path.getsize(path)
+    quality = psnr(source, path, width, height)
+    os.remove(path)
+    return len(source) / elapsed, cpu, size, quality
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 1920
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 1080
+    source = list(synthetic_screen_frames(frames, width, height))
+
+    print(f"{frames} frames at {width}x{height}, {os.cpu_count()} CPUs")
+    print(f"{'profile':>15} {'threads':>8} {'fps':>8} {'cpu/frame ms':>13} {'size KB':>9} {'PSNR dB':>8}")
+    results = {}
+    for name, profile in ENCODING_PROFILES.items():
+        fps, cpu, size, quality = bench(profile, source, width, height)
+        results[name] = (fps, size)
+        print(f"{name:>15} {profile.threads():>8} {fps:>8.1f} {cpu / frames * 1000:>13.2f} "
+              f"{size / 1024:>9.0f} {quality:>8.2f}")
+
+    fastest = max(fps for fps, _ in results.values())
+    largest = max(size for _, size in results.values())
+    print()
+    for name, (fps, size) in results.items():
+        print(f"{name:>15} speed {'#' * round(CHART_WIDTH * fps / fastest):<{CHART_WIDTH}}")
+        print(f"{'':>15} size  {'=' * round(CHART_WIDTH * size / largest):<{CHART_WIDTH}}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Scaling benchmark for VideoProcessor.export_parallel.
+
+Exports the same synthetic recording with an increasing number of workers,
+reporting speedup and parallel efficiency against one worker, and checks
+that every worker count produces an identical video stream.
+
+Run from the repository root:
+    python benchmarks/bench_parallel_export.py [seconds] [width] [height]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from video_processing import VideoProcessor
+
+THREADS_PER_CHUNK = 2
+
+def make_source(path, seconds, width, height):
+    """Encode a synthetic source with a 2 second GOP."""
+    subprocess.run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=30:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "60", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", path
+    ], check=True)
+
+def video_hash(path):
+    """Hash the video packets of a file, ignoring container metadata."""
+    output = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path,
+         "-map", "0:v", "-c", "copy", "-f", "hash", "-hash", "md5", "-"],
+        capture_output=True, text=True, check=True
+    )
+    return output.stdout.strip()
+
+def worker_counts():
+    """Powers of two up to the number of chunk slots the machine can run."""
+    limit = max(1, (os.cpu_count() or 1) // THREADS_PER_CHUNK)
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 1920
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 1080
+
+    directory = tempfile.mkdtemp()
+    source = os.path.join(directory, "source.mp4")
+    make_source(source, seconds, width, height)
+
+    print(f"{seconds} s at {width}x{height}, {THREADS_PER_CHUNK} threads per chunk, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'x realtime':>11} {'speedup':>8} {'efficiency':>11} {'identical':>10}")
+    baseline = None
+    reference_hash = None
+    for workers in worker_counts():
+        output = os.path.join(directory, f"export_{workers}.mp4")
+        processor = VideoProcessor(output_path=source)
+        start = time.perf_counter()
+        processor.export_parallel(output, workers=workers, threads_per_chunk=THREADS_PER_CHUNK)
+        elapsed = time.perf_counter() - start
+
+        digest = video_hash(output)
+        if baseline is None:
+            baseline, reference_hash = elapsed, digest
+        speedup = baseline / elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {seconds / elapsed:>11.1f} {speedup:>8.2f} "
+              f"{speedup / workers:>11.0%} {str(digest == reference_hash):>10}")
+        os.remove(output)
+    os.remove(source)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Throughput benchmark for the streaming polyphase resampler.
+
+Run from the repository root:
+    python benchmarks/bench_resampler.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resampler import PolyphaseResampler
+
+RATE_PAIRS = [(48000, 44100), (44100, 48000), (96000, 48000), (16000, 48000)]
+TAPS = [16, 32, 64]
+SECONDS = 10
+BLOCK_SIZE = 2048
+CHANNELS = 2
+
+def bench(input_rate, output_rate, taps):
+    """Resample SECONDS of noise block by block and return the real-time factor."""
+    resampler = PolyphaseResampler(input_rate, output_rate, CHANNELS, taps_per_phase=taps)
+    signal = np.random.default_rng(0).standard_normal((input_rate * SECONDS, CHANNELS)).astype(np.float32)
+
+    start = time.perf_counter()
+    for offset in range(0, len(signal), BLOCK_SIZE):
+        resampler.process(signal[offset:offset + BLOCK_SIZE])
+    elapsed = time.perf_counter() - start
+    return SECONDS / elapsed, len(signal) / elapsed / 1e6
+
+def main():
+    print(f"{'conversion':>16} {'taps':>5} {'x realtime':>11} {'Msamples/s':>11}")
+    for input_rate, output_rate in RATE_PAIRS:
+        for taps in TAPS:
+            realtime, throughput = bench(input_rate, output_rate, taps)
+            print(f"{input_rate:>7}->{output_rate:<7} {taps:>5} {realtime:>11.1f} {throughput:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import json
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Tuple
+from annotations import TextAnnotation
+from utils.media_utils import probe_duration
+
+@dataclass
+class Clip:
+    """A range of a source file placed on the output timeline."""
+    source: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+@dataclass
+class PlannedSpan:
+    """A piece of the output produced from one source range in the render plan."""
+    source: str
+    start: float
+    end: float
+    offset: float  # Output time at which the span starts
+    annotations: Tuple[TextAnnotation, ...] = ()
+
+    @property
+    def needs_encode(self) -> bool:
+        """Whether pixels change, so the span cannot be stream-copied."""
+        return bool(self.annotations)
+
+class EditDecisionList:
+    def __init__(self, source: Optional[str] = None):
+        """Initialize an edit decision list.
+
+        Edits are recorded against the output timeline and nothing is written
+        until the list is rendered, so chained edits cost a single pass.
+
+        Args:
+            source: Optional video whose full length becomes the first clip
+        """
+        self.clips: List[Clip] = []
+        self.annotations: List[TextAnnotation] = []
+        if source is not None:
+            self.append(source)
+
+    @property
+    def duration(self) -> float:
+        """Length of the output timeline in seconds."""
+        return sum(clip.duration for clip in self.clips)
+
+    def append(self, source: str, start: float = 0.0, end: Optional[float] = None):
+        """Add a source range at the end of the timeline (merging recordings).
+
+        Args:
+            source: Video file to append
+            start: Start time in the source in seconds
+            end: End time in the source (defaults to its duration)
+        """
+        if end is None:
+            end = probe_duration(source)
+        if end <= start:
+            raise ValueError("Clip range is empty")
+        self.clips.append(Clip(source, start, end))
+
+    def trim(self, start_time: float, end_time: float):
+        """Keep only the given range of the output timeline."""
+        if end_time <= start_time:
+            raise ValueError("Trim range is empty")
+        self.cut([(end_time, self.duration), (0.0, start_time)])
+
+    def cut(self, ranges: List[Tuple[float, float]]):
+        """Remove ranges of the output timeline.
+
+        Args:
+            ranges: List of (start, end) ranges in seconds, in output time
+        """
+        # Cut from the end so earlier ranges keep their output times
+        for start, end in sorted(ranges, reverse=True):
+            start, end = max(0.0, start), min(self.duration, end)
+            if end <= start:
+                continue
+            first = self._split(start)
+            last = self._split(end)
+            del self.clips[first:last]
+            self._shift_annotations(start, end)
+        if not self.clips:
+            raise ValueError("Nothing left after cutting ranges")
+
+    def add_annotation(self, annotation: TextAnnotation):
+        """Add an annotation whose start/end times are in output time."""
+        self.annotations.append(annotation)
+
+    def plan(self) -> List[PlannedSpan]:
+        """Split the timeline into spans that are either copied or re-encoded.
+
+        Clips are split wherever an annotation starts or ends, so only the
+        frames that actually carry an annotation need encoding.
+
+        Returns:
+            Spans in playback order
+        """
+        spans = []
+        offset = 0.0
+        for clip in self.clips:
+            clip_end = offset + clip.duration
+            boundaries = {offset, clip_end}
+            for annotation in self.annotations:
+                for time in (annotation.start_time, annotation.end_time):
+                    if time is not None and offset < time < clip_end:
+                        boundaries.add(time)
+            edges = sorted(boundaries)
+            for span_start, span_end in zip(edges, edges[1:]):
+                active = tuple(a for a in self.annotations if self._overlaps(a, span_start, span_end))
+                spans.append(PlannedSpan(
+                    source=clip.source,
+                    start=clip.start + span_start - offset,
+                    end=clip.start + span_end - offset,
+                    offset=span_start,
+                    annotations=active
+                ))
+            offset = clip_end
+        return self._merge_spans(spans)
+
+    def save(self, path: str):
+        """Save the edit list as JSON."""
+        with open(path, "w") as f:
+            json.dump({
+                "clips": [asdict(clip) for clip in self.clips],
+                "annotations": [asdict(annotation) for annotation in self.annotations],
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "EditDecisionList":
+        """Load an edit list saved with save()."""
+        with open(path) as f:
+            data = json.load(f)
+        edit_list = cls()
+        edit_list.clips = [Clip(**clip) for clip in data.get("clips", [])]
+        for annotation in data.get("annotations", []):
+            for key in ("position", "color", "background_color"):
+                if annotation.get(key) is not None:
+                    annotation[key] = tuple(annotation[key])
+            edit_list.annotations.append(TextAnnotation(**annotation))
+        return edit_list
+
+    def _split(self, time: float) -> int:
+        """Split the clip containing an output time.
+
+        Returns:
+            Index of the first clip starting at or after the time
+        """
+        offset = 0.0
+        for index, clip in enumerate(self.clips):
+            if time <= offset + 1e-6:
+                return index
+            if time < offset + clip.duration - 1e-6:
+                split = clip.start + time - offset
+                self.clips[index:index + 1] = [Clip(clip.source, clip.start, split),
+                                               Clip(clip.source, split, clip.end)]
+                return index + 1
+            offset += clip.duration
+        return len(self.clips)
+
+    def _shift_annotations(self, start: float, end: float):
+        """Move annotation times after a removed output range and drop emptied ones."""
+        removed = end - start
+
+        def shift(time):
+            if time is None or time <= start:
+                return time
+            return max(start, time - removed)
+
+        kept = []
+        for annotation in self.annotations:
+            annotation.start_time = shift(annotation.start_time)
+            annotation.end_time = shift(annotation.end_time)
+            if (annotation.start_time is None or annotation.end_time is None
+                    or annotation.end_time > annotation.start_time):
+                kept.append(annotation)
+        self.annotations = kept
+
+    @staticmethod
+    def _overlaps(annotation: TextAnnotation, start: float, end: float) -> bool:
+        """Check whether an annotation is shown anywhere in [start, end)."""
+        after_start = annotation.end_time is None or annotation.end_time > start
+        before_end = annotation.start_time is None or annotation.start_time < end
+        return after_start and before_end
+
+    @staticmethod
+    def _merge_spans(spans: List[PlannedSpan]) -> List[PlannedSpan]:
+        """Join adjacent spans that continue the same source range with the same annotations."""
+        merged = []
+        for span in spans:
+            previous = merged[-1] if merged else None
+            if (previous and previous.source == span.source
+                    and abs(previous.end - span.start) < 1e-6
+                    and previous.annotations == span.annotations):
+                previous.end = span.end
+            else:
+                merged.append(span)
+        return merged
@@ -0,0 +1,308 @@
+import abc
+import os
+import shutil
+import subprocess
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Iterable, List, Optional
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# x264 gains little beyond this many threads at screen resolutions and
+# loses some efficiency from the extra slices
+MAX_ENCODER_THREADS = 16
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """x264 settings tuned for screen content."""
+    name: str
+    preset: str
+    tune: Optional[str]
+    crf: int
+    keyint_seconds: float
+    core_share: float = 1.0  # Fraction of the CPU cores given to the encoder
+
+    def threads(self) -> int:
+        """Get the encoder thread count for this machine."""
+        cores = os.cpu_count() or 1
+        return max(1, min(MAX_ENCODER_THREADS, int(cores * self.core_share)))
+
+    def keyint(self, fps: float) -> int:
+        """Get the maximum GOP length in frames."""
+        return max(1, round(self.keyint_seconds * fps))
+
+    def ffmpeg_args(self, fps: float) -> List[str]:
+        """Get the ffmpeg output options (without the thread count)."""
+        args = ["-preset", self.preset, "-crf", str(self.crf), "-g", str(self.keyint(fps))]
+        if self.tune:
+            args += ["-tune", self.tune]
+        return args
+
+    def codec_options(self, fps: float) -> dict:
+        """Get the same settings as libav codec options."""
+        options = {"preset": self.preset, "crf": str(self.crf), "g": str(self.keyint(fps))}
+        if self.tune:
+            options["tune"] = self.tune
+        return options
+
+ENCODING_PROFILES = {
+    # Lossless intermediate that a background transcode turns into the final file;
+    # short GOPs give the transcode small chunks to pause between. Lossless x264
+    # is always High 4:4:4 Predictive, which common players cannot decode, so
+    # this profile is for editing and transcoding only, never for sharing
+    "capture-lossless": EncodingProfile("capture-lossless", preset="ultrafast", tune=None,
+                                        crf=0, keyint_seconds=1.0, core_share=0.5),
+    # Cheapest encode while the recorded application still needs the CPU
+    "capture-fast": EncodingProfile("capture-fast", preset="ultrafast", tune="zerolatency",
+                                    crf=23, keyint_seconds=2.0, core_share=0.5),
+    # Text-heavy content is mostly static: long GOPs and stillimage tuning
+    "archive-small": EncodingProfile("archive-small", preset="slow", tune="stillimage",
+                                     crf=30, keyint_seconds=10.0),
+    # Sharp edges and flat areas survive better with animation tuning
+    "share-balanced": EncodingProfile("share-balanced", preset="veryfast", tune="animation",
+                                      crf=24, keyint_seconds=4.0),
+    # Low-resolution editing copies: a keyframe every few frames and no CABAC
+    # or deblocking, so any seek decodes only a handful of cheap frames
+    "proxy": EncodingProfile("proxy", preset="ultrafast", tune="fastdecode",
+                             crf=28, keyint_seconds=0.2, core_share=0.25),
+}
+
+DEFAULT_ENCODING_PROFILE = "share-balanced"
+
+def get_encoding_profile(name: Optional[str] = None) -> EncodingProfile:
+    """Get an encoding profile by name (None returns the default)."""
+    name = name or DEFAULT_ENCODING_PROFILE
+    if name not in ENCODING_PROFILES:
+        raise ValueError(f"Unknown encoding profile: {name}")
+    return ENCODING_PROFILES[name]
+
+class EncoderBackend(abc.ABC):
+    """Base class for writers that encode RGB frames incrementally."""
+    name = None
+
+    def __init__(self, output_path: str, fps: float = 30.0, codec: str = "libx264",
+                 threads: Optional[int] = None, profile: Optional[EncodingProfile] = None):
+        """Initialize the encoder.
+
+        Args:
+            output_path: Path of the video file to write
+            fps: Frames per second
+            codec: Video codec name
+            threads: Encoder thread count (None uses the profile's, or lets the encoder decide)
+            profile: Optional x264 encoding profile
+        """
+        self.output_path = output_path
+        self.fps = fps
+        self.codec = codec
+        self.profile = profile
+        if threads is None and profile is not None:
+            threads = profile.threads()
+        self.threads = threads
+        self.size = None
+        self.frames_written = 0
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Check whether the backend can be used on this system."""
+        return True
+
+    @abc.abstractmethod
+    def open(self, width: int, height: int):
+        """Prepare the encoder for frames of the given size."""
+
+    @abc.abstractmethod
+    def write(self, frame: np.ndarray):
+        """Encode one RGB frame of shape (height, width, 3)."""
+
+    @abc.abstractmethod
+    def close(self):
+        """Flush pending frames and finalize the file."""
+
+    def encode(self, frames: Iterable[np.ndarray]) -> int:
+        """Encode frames from an iterator, opening on the first frame.
+
+        Returns:
+            Number of frames written
+        """
+        try:
+            for frame in frames:
+                if self.size is None:
+                    self.open(frame.shape[1], frame.shape[0])
+                self.write(frame)
+        finally:
+            if self.size is not None:
+                self.close()
+        return self.frames_written
+
+class FFmpegPipeEncoder(EncoderBackend):
+    """Pipes raw RGB frames into an ffmpeg process."""
+    name = "ffmpeg"
+
+    def __init__(self, *args, audio_input: Optional[List[str]] = None,
+                 audio_output: Optional[List[str]] = None, **kwargs):
+        """Initialize the encoder.
+
+        Args:
+            audio_input: Optional ffmpeg input options for a second input whose
+                audio is muxed alongside the frames (e.g. ["-ss", "5", "-t", "2", "-i", path])
+            audio_output: Optional audio output options (defaults to AAC)
+        """
+        super().__init__(*args, **kwargs)
+        self.audio_input = audio_input
+        self.audio_output = audio_output or ["-c:a", "aac"]
+        self.process = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return shutil.which("ffmpeg") is not None
+
+    def output_args(self) -> list:
+        """Get the ffmpeg output options for the video stream."""
+        args = ["-c:v", self.codec, "-pix_fmt", "yuv420p"]
+        if self.profile is not None:
+            args += self.profile.ffmpeg_args(self.fps)
+        if self.threads is not None:
+            args += ["-threads", str(self.threads)]
+        return args
+
+    def open(self, width: int, height: int):
+        self.size = (width, height)
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}", "-r", str(self.fps),
+            "-i", "pipe:",
+        ]
+        if self.audio_input:
+            command += [*self.audio_input, "-map", "0:v", "-map", "1:a?", *self.audio_output, "-shortest"]
+        command += [
+            # yuv420p needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            *self.output_args(),
+            self.output_path
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frame: np.ndarray):
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        except (BrokenPipeError, OSError):
+            raise RuntimeError(f"ffmpeg encoder stopped: {self.process.stderr.read().decode(errors='replace')}")
+        self.frames_written += 1
+
+    def close(self):
+        process, self.process = self.process, None
+        if not process:
+            return
+        try:
+            process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        error = process.stderr.read().decode(errors="replace").strip()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg encoding failed: {error}")
+
+class PyAVEncoder(EncoderBackend):
+    """Encodes in-process through PyAV (libav bindings)."""
+    name = "pyav"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.container = None
+        self.stream = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return av is not None
+
+    def stream_options(self) -> dict:
+        """Get codec options for the video stream."""
+        if self.profile is None:
+            return {}
+        return self.profile.codec_options(self.fps)
+
+    def open(self, width: int, height: int):
+        self.size = (width, height)
+        self.container = av.open(self.output_path, mode="w")
+        self.stream = self.container.add_stream(self.codec, rate=Fraction(self.fps).limit_denominator(1001))
+        # yuv420p needs even dimensions
+        self.stream.width = width - width % 2
+        self.stream.height = height - height % 2
+        self.stream.pix_fmt = "yuv420p"
+        self.stream.options = self.stream_options()
+        if self.threads is not None:
+            self.stream.codec_context.thread_count = self.threads
+
+    def write(self, frame: np.ndarray):
+        frame = frame[:self.stream.height, :self.stream.width]
+        video_frame = av.VideoFrame.from_ndarray(np.ascontiguousarray(frame), format="rgb24")
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+        self.frames_written += 1
+
+    def close(self):
+        if not self.container:
+            return
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+        self.container = None
+
+class OpenCVEncoder(EncoderBackend):
+    """Falls back to OpenCV's VideoWriter (MPEG-4 Part 2 unless H.264 is built in)."""
+    name = "opencv"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer = None
+
+    def open(self, width: int, height: int):
+        self.size = (width, height)
+        fourcc = cv2.VideoWriter_fourcc(*("avc1" if self.codec in ("libx264", "h264") else "mp4v"))
+        self.writer = cv2.VideoWriter(self.output_path, fourcc, self.fps, (width, height))
+        if not self.writer.isOpened():
+            # H.264 is often missing from OpenCV builds
+            self.writer = cv2.VideoWriter(self.output_path, cv2.VideoWriter_fourcc(*"mp4v"),
+                                          self.fps, (width, height))
+        if not self.writer.isOpened():
+            raise RuntimeError("OpenCV could not open a video writer")
+
+    def write(self, frame: np.ndarray):
+        self.writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+        self.frames_written += 1
+
+    def close(self):
+        if self.writer:
+            self.writer.release()
+            self.writer = None
+
+# Backends in order of preference
+ENCODER_BACKENDS = {
+    FFmpegPipeEncoder.name: FFmpegPipeEncoder,
+    PyAVEncoder.name: PyAVEncoder,
+    OpenCVEncoder.name: OpenCVEncoder,
+}
+
+def get_encoder_backend(name: Optional[str] = None):
+    """Get an encoder backend class by name, or the best available one.
+
+    Args:
+        name: Backend name, one of ENCODER_BACKENDS (None picks automatically)
+    """
+    if name is not None:
+        if name not in ENCODER_BACKENDS:
+            raise ValueError(f"Unknown encoder backend: {name}")
+        backend = ENCODER_BACKENDS[name]
+        if not backend.is_available():
+            raise RuntimeError(f"Encoder backend '{name}' is not available")
+        return backend
+
+    for backend in ENCODER_BACKENDS.values():
+        if backend.is_available():
+            return backend
+    raise RuntimeError("No video encoder backend available")
@@ -0,0 +1,346 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, List, Optional
+from video_processing import VideoProcessor
+
+# Job priorities; lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# Assumed media seconds encoded per wall-clock second before any job finished
+DEFAULT_EXPORT_SPEED = 1.0
+
+# Weight of the newest measurement in the running speed average
+SPEED_SMOOTHING = 0.3
+
+# Statuses of jobs that still have work to do
+ACTIVE_STATUSES = ("queued", "running")
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+@dataclass
+class ExportJob:
+    """An export task and its progress."""
+    kind: str
+    params: dict = field(default_factory=dict)
+    priority: int = PRIORITY_NORMAL
+    label: str = ""
+    media_seconds: float = 0.0  # Length of the media to process, used for the ETA
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # "queued", "running", "done", "failed" or "cancelled"
+    progress: float = 0.0
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    # In-memory inputs (e.g. captured frames) that cannot survive a restart
+    payload: Optional[dict] = field(default=None, repr=False)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def resumable(self) -> bool:
+        """Whether the job can be rerun from its journaled parameters."""
+        return self.payload is None
+
+    def report(self, fraction: float):
+        """Record progress from inside the job; raises JobCancelled if cancelled."""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        self.progress = min(1.0, max(self.progress, fraction))
+
+    def to_dict(self) -> dict:
+        """Get the journaled fields."""
+        return {f.name: getattr(self, f.name) for f in fields(self)
+                if f.name not in ("payload", "cancel_event")}
+
+def _trim_job(job: ExportJob) -> str:
+    params = job.params
+    processor = VideoProcessor(output_path=params["source"], profile=params.get("profile"))
+    return processor.trim_video(params["start"], params["end"], progress_callback=job.report)
+
+def _merge_job(job: ExportJob) -> str:
+    params = job.params
+    processor = VideoProcessor(profile=params.get("profile"))
+    return processor.merge_videos(params["paths"], params.get("output_path"),
+                                  progress_callback=job.report)
+
+def _transcode_job(job: ExportJob) -> str:
+    params = job.params
+    processor = VideoProcessor(output_path=params["source"], profile=params.get("profile"))
+    return processor.transcode(params["output_path"], progress_callback=job.report)
+
+def _proxy_job(job: ExportJob) -> str:
+    processor = VideoProcessor(output_path=job.params["source"])
+    return processor.generate_proxy(progress_callback=job.report)
+
+# Handlers for jobs that only need their parameters
+DEFAULT_HANDLERS = {
+    "trim": _trim_job,
+    "merge": _merge_job,
+    "transcode": _transcode_job,
+    "proxy": _proxy_job,
+}
+
+class ExportScheduler:
+    def __init__(self, workers: int = 2, journal_path: Optional[str] = None):
+        """Initialize the export scheduler.
+
+        Jobs run on a fixed number of worker threads in priority order
+        (ties in submission order). Every state change is written to the
+        journal, and resume_journal() requeues jobs a previous session left
+        unfinished.
+
+        Args:
+            workers: Maximum number of jobs running at once
+            journal_path: Optional JSON file recording unfinished jobs
+        """
+        self.workers = workers
+        self.journal_path = journal_path
+        self.handlers: Dict[str, Callable[[ExportJob], Optional[str]]] = dict(DEFAULT_HANDLERS)
+        self.jobs: Dict[str, ExportJob] = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._speeds: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def register_handler(self, kind: str, handler: Callable[[ExportJob], Optional[str]]):
+        """Set the function that runs jobs of a kind.
+
+        The handler receives the job, should call job.report() with its
+        progress and returns the path of the exported file.
+        """
+        self.handlers[kind] = handler
+
+    def start(self):
+        """Start the worker threads."""
+        with self._condition:
+            self._stopping = False
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def shutdown(self, wait: bool = True, cancel_running: bool = False):
+        """Stop the workers after their current job.
+
+        Queued jobs stay in the journal and resume next session.
+
+        Args:
+            wait: Wait for running jobs to finish
+            cancel_running: Request cancellation of running jobs first
+        """
+        with self._condition:
+            self._stopping = True
+            if cancel_running:
+                for job in self.jobs.values():
+                    if job.status == "running":
+                        job.cancel_event.set()
+            self._condition.notify_all()
+            threads, self._threads = self._threads, []
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def submit(self, kind: str, params: Optional[dict] = None, priority: int = PRIORITY_NORMAL,
+               label: str = "", media_seconds: float = 0.0, payload: Optional[dict] = None) -> ExportJob:
+        """Queue a job.
+
+        Args:
+            kind: Job kind with a registered handler ("trim", "merge", "transcode", ...)
+            params: JSON-serializable parameters for the handler
+            priority: Lower values run first
+            label: Name shown to the user
+            media_seconds: Length of the media to process, used for the ETA
+            payload: Optional in-memory inputs; such jobs are not resumed after a restart
+
+        Returns:
+            The queued job
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"No handler for export job kind: {kind}")
+        job = ExportJob(kind, params or {}, priority, label or kind, media_seconds, payload=payload)
+        with self._condition:
+            self._enqueue(job)
+            self._write_journal()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job or request a running one to stop.
+
+        A running job stops at its next progress report. One that finishes
+        its output before reporting again completes as done.
+
+        Returns:
+            Whether the job was still active
+        """
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return False
+            job.cancel_event.set()
+            if job.status == "queued":
+                self._finish(job, "cancelled")
+            return True
+
+    def active_jobs(self) -> List[ExportJob]:
+        """Get running and queued jobs, running first, then in run order."""
+        with self._condition:
+            running = [job for job in self.jobs.values() if job.status == "running"]
+            queued = [job for _, _, job in sorted(self._queue) if job.status == "queued"]
+            return running + queued
+
+    def estimate_seconds(self, job: ExportJob) -> float:
+        """Estimate the total wall-clock run time of a job from measured speed."""
+        speed = self._speeds.get(job.kind, DEFAULT_EXPORT_SPEED)
+        return job.media_seconds / speed if speed > 0 else 0.0
+
+    def eta(self, job_id: str) -> Optional[float]:
+        """Estimate the seconds until a job finishes.
+
+        Running jobs extrapolate from their own progress once it is
+        measurable; queued jobs add the remaining work ahead of them,
+        shared across the workers.
+
+        Returns:
+            Seconds remaining, or None if the job is not active
+        """
+        ahead = 0.0
+        for job in self.active_jobs():
+            remaining = self._remaining_seconds(job)
+            if job.job_id == job_id:
+                if job.status == "running":
+                    return remaining
+                return ahead / max(1, self.workers) + remaining
+            ahead += remaining
+        return None
+
+    def resume_journal(self) -> List[ExportJob]:
+        """Requeue the unfinished jobs recorded by a previous session.
+
+        Returns:
+            The requeued jobs
+        """
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return []
+        try:
+            with open(self.journal_path) as f:
+                entries = json.load(f).get("jobs", [])
+        except (OSError, ValueError) as e:
+            print(f"Error reading export journal: {e}")
+            return []
+
+        resumed = []
+        with self._condition:
+            for entry in entries:
+                if entry.get("status") not in ACTIVE_STATUSES or entry.get("job_id") in self.jobs:
+                    continue
+                if not entry.pop("resumable", True) or entry.get("kind") not in self.handlers:
+                    print(f"Cannot resume export '{entry.get('label')}': its data was not saved")
+                    continue
+                job = ExportJob(**entry)
+                job.status, job.progress, job.started = "queued", 0.0, None
+                self._enqueue(job)
+                resumed.append(job)
+            self._write_journal()
+        return resumed
+
+    def _enqueue(self, job: ExportJob):
+        """Add a job to the queue; the condition lock must be held."""
+        self.jobs[job.job_id] = job
+        heapq.heappush(self._queue, (job.priority, next(self._sequence), job))
+        self._condition.notify()
+
+    def _remaining_seconds(self, job: ExportJob) -> float:
+        """Estimate the wall-clock seconds a job still needs."""
+        estimate = self.estimate_seconds(job)
+        if job.status != "running":
+            return estimate
+        elapsed = time.time() - job.started
+        if job.progress >= 0.05:
+            return elapsed / job.progress * (1.0 - job.progress)
+        return max(0.0, estimate - elapsed)
+
+    def _run(self):
+        """Worker loop."""
+        while True:
+            with self._condition:
+                while not self._stopping and not self._queue:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                if job.status != "queued":
+                    continue
+                job.status = "running"
+                job.started = time.time()
+                self._write_journal()
+            self._execute(job)
+
+    def _execute(self, job: ExportJob):
+        """Run one job through its handler and record the outcome."""
+        try:
+            job.report(0.0)
+            result = self.handlers[job.kind](job)
+            if result is None:
+                raise RuntimeError("Export produced no file")
+        except JobCancelled:
+            status, result = "cancelled", None
+        except Exception as e:
+            status, result = ("cancelled" if job.cancel_event.is_set() else "failed"), None
+            job.error = str(e)
+            if status == "failed":
+                print(f"Export '{job.label}' failed: {e}")
+        else:
+            status = "done"
+            self._record_speed(job)
+
+        with self._condition:
+            job.result = result
+            self._finish(job, status)
+
+    def _record_speed(self, job: ExportJob):
+        """Update the measured speed of a job kind from a finished job."""
+        elapsed = time.time() - job.started
+        if job.media_seconds <= 0 or elapsed <= 0:
+            return
+        speed = job.media_seconds / elapsed
+        previous = self._speeds.get(job.kind)
+        self._speeds[job.kind] = speed if previous is None else (
+            previous + SPEED_SMOOTHING * (speed - previous)
+        )
+
+    def _finish(self, job: ExportJob, status: str):
+        """Mark a job finished; the condition lock must be held."""
+        job.status = status
+        job.finished = time.time()
+        if status == "done":
+            job.progress = 1.0
+        job.payload = None
+        self._write_journal()
+
+    def _write_journal(self):
+        """Write the active jobs to the journal atomically; the condition lock must be held."""
+        if not self.journal_path:
+            return
+        entries = []
+        for job in self.jobs.values():
+            if job.status in ACTIVE_STATUSES:
+                entries.append({**job.to_dict(), "resumable": job.resumable})
+        temp_path = f"{self.journal_path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump({"jobs": entries}, f, indent=2)
+            os.replace(temp_path, temp_path[:-len(".tmp")])
+        except OSError as e:
+            print(f"Error writing export journal: {e}")
@@ -0,0 +1,270 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+import numpy as np
+from typing import Optional, Tuple
+from seek_index import SeekIndex
+from utils.media_utils import decode_frames, probe_stream_params
+
+# Memory budget of the decoded-frame cache (about 80 frames of 1080p RGB)
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+# Frames decoded ahead of the playhead in the scrubbing direction
+READ_AHEAD_FRAMES = 30
+
+# Width of reduced-resolution scrub previews
+PREVIEW_WIDTH = 640
+
+@dataclass
+class FrameServerStats:
+    """Cache and decode counters of a frame server."""
+    hits: int = 0
+    misses: int = 0
+    read_ahead_hits: int = 0  # Hits on frames that only read-ahead had decoded
+    frames_decoded: int = 0
+    evictions: int = 0
+    cached_bytes: int = 0
+    decode_seconds: float = 0.0  # Total time requests spent waiting on a decode
+    max_decode_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    @property
+    def mean_decode_ms(self) -> float:
+        return self.decode_seconds / self.misses * 1000 if self.misses else 0.0
+
+class FrameServer:
+    def __init__(self, video_path: str, cache_bytes: int = DEFAULT_CACHE_BYTES,
+                 read_ahead: int = READ_AHEAD_FRAMES, preview_width: int = PREVIEW_WIDTH):
+        """Initialize a frame server for scrubbing a video.
+
+        Decoded frames are kept in an LRU cache bounded by bytes. A miss
+        decodes from the preceding keyframe (found in the seek index) and
+        caches every frame on the way. After each request a background
+        thread decodes the next frames in the direction the playhead is
+        moving, so steady scrubbing is served from the cache.
+
+        Args:
+            video_path: Video file to serve frames from
+            cache_bytes: Maximum size of the decoded frames kept in memory
+            read_ahead: Frames decoded ahead of the playhead (0 disables read-ahead)
+            preview_width: Width of the reduced-resolution preview frames
+        """
+        self.video_path = video_path
+        self.cache_bytes = cache_bytes
+        self.read_ahead = read_ahead
+        self.index = SeekIndex.for_video(video_path)
+        if not len(self.index):
+            raise ValueError(f"No video frames in {video_path}")
+        video = probe_stream_params(video_path)["video"]
+        self.frame_size = (video["width"], video["height"])
+        preview_width = min(preview_width, self.frame_size[0])
+        self.preview_size = (preview_width - preview_width % 2,
+                             max(2, round(preview_width * self.frame_size[1] / self.frame_size[0] / 2) * 2))
+
+        self._times = self.index.entries["pts"] - self.index.entries["pts"][0]
+        self._cache = OrderedDict()
+        self._read_ahead_keys = set()
+        self._stats = FrameServerStats()
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._request = None
+        self._in_flight = None  # (preview, first, last) of the read-ahead decode in progress
+        self._generation = 0
+        self._last_index = None
+        self._direction = 1
+        self._preview = False
+        self._closed = False
+        self._thread = None
+        if read_ahead > 0:
+            self._thread = threading.Thread(target=self._run, name="FrameServer-Thread", daemon=True)
+            self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def frame_time(self, index: int) -> float:
+        """Get the presentation time of a frame, relative to the first frame."""
+        return float(self._times[index])
+
+    def get_frame(self, at_time: float, preview: bool = False) -> np.ndarray:
+        """Get the frame shown at a time.
+
+        Args:
+            at_time: Time in seconds from the start of the video
+            preview: Return a reduced-resolution frame, which decodes faster
+
+        Returns:
+            Read-only RGB frame of shape (height, width, 3)
+        """
+        index = min(max(0, int(np.searchsorted(self._times, at_time, side="right")) - 1), len(self) - 1)
+        return self.get_frame_at_index(index, preview)
+
+    def get_frame_at_index(self, index: int, preview: bool = False) -> np.ndarray:
+        """Get a frame by its position in presentation order."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Frame {index} out of range")
+        key = (index, preview)
+        start = time.perf_counter()
+        with self._condition:
+            frame = self._cache.get(key)
+            if frame is not None:
+                self._cache.move_to_end(key)
+                self._stats.hits += 1
+                if key in self._read_ahead_keys:
+                    self._stats.read_ahead_hits += 1
+                    self._read_ahead_keys.discard(key)
+                self._track_playhead(index, preview, supersede=False)
+                self._request_read_ahead(index, preview)
+                return frame
+
+            self._stats.misses += 1
+            covered = self._read_ahead_covers(index, preview)
+            self._track_playhead(index, preview, supersede=not covered)
+            # Read-ahead is already decoding this frame; wait for it rather than start over
+            while frame is None and self._read_ahead_covers(index, preview):
+                self._condition.wait()
+                frame = self._cache.get(key)
+
+        if frame is None:
+            frame = self._decode(self.index.keyframe_index(index), index, preview)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._stats.decode_seconds += elapsed
+            self._stats.max_decode_seconds = max(self._stats.max_decode_seconds, elapsed)
+            # Read-ahead continues from here instead of racing the decode above
+            self._request_read_ahead(index, preview)
+        if frame is None:
+            raise RuntimeError(f"Could not decode frame {index} of {self.video_path}")
+        return frame
+
+    def stats(self) -> FrameServerStats:
+        """Get a snapshot of the cache and decode counters."""
+        with self._lock:
+            return replace(self._stats)
+
+    def clear(self):
+        """Drop all cached frames."""
+        with self._lock:
+            self._cache.clear()
+            self._read_ahead_keys.clear()
+            self._stats.cached_bytes = 0
+
+    def close(self):
+        """Stop the read-ahead thread and release the cache."""
+        with self._condition:
+            self._closed = True
+            self._generation += 1
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.clear()
+
+    def _track_playhead(self, index: int, preview: bool, supersede: bool):
+        """Update the scrubbing direction from a request; the lock must be held.
+
+        Args:
+            index: Requested frame
+            preview: Whether preview frames were requested
+            supersede: Stop the read-ahead in progress (e.g. on a miss, which decodes itself)
+        """
+        direction = self._direction
+        if self._last_index is not None and index != self._last_index:
+            direction = 1 if index > self._last_index else -1
+        if direction != self._direction or preview != self._preview:
+            supersede = True
+        self._last_index, self._direction, self._preview = index, direction, preview
+        if supersede:
+            self._generation += 1
+
+    def _read_ahead_covers(self, index: int, preview: bool) -> bool:
+        """Whether the read-ahead decode in progress will reach a frame; the lock must be held."""
+        if self._in_flight is None:
+            return False
+        in_flight_preview, first, last = self._in_flight
+        return in_flight_preview == preview and first <= index <= last
+
+    def _request_read_ahead(self, index: int, preview: bool):
+        """Ask the read-ahead thread to decode past a frame; the lock must be held."""
+        if self._thread is not None:
+            self._request = (index, self._direction, preview, self._generation)
+            self._condition.notify()
+
+    def _run(self):
+        """Read-ahead loop: decode the frames after the latest request."""
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                index, direction, preview, generation = self._request
+                self._request = None
+                if direction > 0:
+                    wanted = range(index + 1, min(len(self), index + 1 + self.read_ahead))
+                else:
+                    wanted = range(max(0, index - self.read_ahead), index)
+                missing = [i for i in wanted if (i, preview) not in self._cache]
+                if not missing:
+                    continue
+                first = self.index.keyframe_index(missing[0])
+                self._in_flight = (preview, first, max(missing))
+            try:
+                self._decode(first, max(missing), preview, generation=generation)
+            except Exception as e:
+                print(f"Frame read-ahead error: {e}")
+            finally:
+                with self._condition:
+                    self._in_flight = None
+                    self._condition.notify_all()
+
+    def _decode(self, first: int, last: int, preview: bool,
+                generation: Optional[int] = None) -> Optional[np.ndarray]:
+        """Decode frames first..last, caching all of them.
+
+        Args:
+            first: Position of a keyframe to start decoding at
+            last: Position of the last frame to decode
+            preview: Decode at the preview size
+            generation: Read-ahead generation; decoding stops once a newer request arrives
+
+        Returns:
+            The last frame, or None if decoding stopped early
+        """
+        size: Tuple[int, int] = self.preview_size if preview else self.frame_size
+        frames = decode_frames(
+            self.video_path, start=round(self.frame_time(first), 6),
+            size=size if preview else None, frame_size=size,
+            extra_args=["-vsync", "passthrough"]
+        )
+        frame, index = None, first - 1
+        try:
+            for index, frame in enumerate(frames, start=first):
+                with self._lock:
+                    self._stats.frames_decoded += 1
+                    self._store((index, preview), frame, read_ahead=generation is not None)
+                if index >= last or (generation is not None and generation != self._generation):
+                    break
+        finally:
+            frames.close()
+        return frame if frame is not None and index >= last else None
+
+    def _store(self, key: tuple, frame: np.ndarray, read_ahead: bool):
+        """Add a frame to the cache and evict the least recently used; the lock must be held."""
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._stats.cached_bytes -= previous.nbytes
+        elif read_ahead:
+            self._read_ahead_keys.add(key)
+        self._cache[key] = frame
+        self._stats.cached_bytes += frame.nbytes
+        self._condition.notify_all()
+        while self._stats.cached_bytes > self.cache_bytes and len(self._cache) > 1:
+            evicted_key, evicted = self._cache.popitem(last=False)
+            self._read_ahead_keys.discard(evicted_key)
+            self._stats.cached_bytes -= evicted.nbytes
+            self._stats.evictions += 1
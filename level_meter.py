@@ -0,0 +1,74 @@
+import time
+import numpy as np
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional, Tuple
+
+SILENCE_DB = -120.0
+
+@dataclass(frozen=True)
+class LevelSnapshot:
+    """Class to store the most recent published audio levels."""
+    peak_db: Tuple[float, ...]
+    rms_db: Tuple[float, ...]
+    timestamp: float
+
+class LevelMeter:
+    def __init__(self, sample_rate: int, channels: int, ui_rate: float = 20.0):
+        """Initialize a peak/RMS level meter.
+
+        Levels are accumulated over windows of sample_rate / ui_rate samples
+        and published once per window, so readers see a fixed update rate
+        regardless of the device sample rate or block size.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of channels
+            ui_rate: Snapshots published per second
+        """
+        self.channels = channels
+        self.window = max(1, int(sample_rate / ui_rate))
+        self._lock = Lock()
+        self._snapshot = None
+        self._reset_window()
+
+    def _reset_window(self):
+        self._peak = np.zeros(self.channels)
+        self._sum_squares = np.zeros(self.channels)
+        self._count = 0
+
+    def process(self, block: np.ndarray):
+        """Accumulate levels for one block of captured audio."""
+        x = np.asarray(block)
+        if x.dtype.kind in 'iu':
+            x = x / float(np.iinfo(x.dtype).max + 1)
+        x = x.reshape(len(x), -1)
+
+        start = 0
+        while start < len(x):
+            chunk = x[start:start + self.window - self._count]
+            start += len(chunk)
+            self._peak = np.maximum(self._peak, np.max(np.abs(chunk), axis=0))
+            self._sum_squares += np.einsum('ij,ij->j', chunk, chunk, dtype=np.float64)
+            self._count += len(chunk)
+            if self._count == self.window:
+                self._publish()
+
+    def _publish(self):
+        """Publish the finished window as the current snapshot."""
+        with np.errstate(divide='ignore'):
+            peak_db = np.maximum(20.0 * np.log10(self._peak), SILENCE_DB)
+            rms_db = np.maximum(10.0 * np.log10(self._sum_squares / self._count), SILENCE_DB)
+        snapshot = LevelSnapshot(
+            peak_db=tuple(float(v) for v in peak_db),
+            rms_db=tuple(float(v) for v in rms_db),
+            timestamp=time.monotonic()
+        )
+        with self._lock:
+            self._snapshot = snapshot
+        self._reset_window()
+
+    def snapshot(self) -> Optional[LevelSnapshot]:
+        """Get the latest published levels (thread-safe)."""
+        with self._lock:
+            return self._snapshot
@@ -0,0 +1,257 @@
+import csv
+import math
+import os
+import queue
+import subprocess
+import threading
+import numpy as np
+from typing import List, Optional, Tuple
+from annotations import AnnotationManager
+from encoders import get_encoding_profile
+from utils.media_utils import run_ffmpeg
+
+# Frames buffered between the capture thread and the live encoder
+LIVE_QUEUE_FRAMES = 60
+
+# How often the rolling playlist is refreshed, in seconds
+PLAYLIST_REFRESH_SECONDS = 0.5
+
+PLAYLIST_NAME = "playlist.m3u8"
+SEGMENT_LIST_NAME = "segments.csv"
+SEGMENT_PATTERN = "segment_%05d.ts"
+
+class LiveSegmenter:
+    def __init__(self, output_dir: str, fps: float = 30.0, segment_seconds: float = 4.0,
+                 window_segments: int = 6, profile: str = "capture-fast",
+                 annotation_manager: Optional[AnnotationManager] = None):
+        """Initialize live HLS output for a recording in progress.
+
+        Frames are encoded as they are captured into MPEG-TS segments by
+        ffmpeg's segment muxer, which lists finished segments in a CSV
+        file. A writer thread keeps a rolling playlist of the newest
+        segments next to them, so any static file server can serve the
+        directory while the recording runs. When the encoder falls behind,
+        the previous frame is repeated in place of each one that could not
+        be queued, so the segments keep the timing of the capture.
+
+        Args:
+            output_dir: Directory for the segments and playlist
+            fps: Frames per second of the capture
+            segment_seconds: Target segment duration
+            window_segments: Number of segments listed in the live playlist
+            profile: Encoding profile name for the live encode
+            annotation_manager: Optional annotations drawn onto the live frames
+        """
+        self.output_dir = output_dir
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.window_segments = window_segments
+        self.profile = get_encoding_profile(profile)
+        self.annotation_manager = annotation_manager
+        self.playlist_path = os.path.join(output_dir, PLAYLIST_NAME)
+        self.frames_dropped = 0
+        self.frames_repeated = 0
+        self.frames_written = 0
+
+        self._queue = queue.Queue(maxsize=LIVE_QUEUE_FRAMES)
+        self._process = None
+        self._error = None
+        self._skipped = 0
+        self._previous = None
+        self._segment_count = 0
+        os.makedirs(output_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="LiveSegmenter-Thread", daemon=True)
+        self._thread.start()
+
+    def push_frame(self, frame: np.ndarray):
+        """Queue a captured frame without blocking the capture thread."""
+        try:
+            self._queue.put_nowait((frame, self._skipped))
+            self._skipped = 0
+        except queue.Full:
+            self._skipped += 1
+            self.frames_dropped += 1
+
+    def finish(self) -> str:
+        """Encode the remaining frames and write the final VOD playlist.
+
+        Returns:
+            Path to the playlist
+        """
+        if self._skipped:
+            # Frames dropped at the very end repeat the last one too
+            self._queue.put((None, self._skipped))
+            self._skipped = 0
+        self._queue.put(None)
+        self._thread.join()
+        if self._error:
+            raise RuntimeError(f"Live output failed: {self._error}")
+        self._write_playlist(self.read_segments(), final=True)
+        return self.playlist_path
+
+    def export_mp4(self, output_path: str, audio_path: Optional[str] = None,
+                   copy_audio: bool = True) -> str:
+        """Join the finished segments into one MP4 by stream copy.
+
+        Args:
+            output_path: Path of the MP4 file
+            audio_path: Optional audio file to mux alongside the video
+            copy_audio: Copy the audio stream as is instead of encoding it to AAC
+
+        Returns:
+            Path to the MP4 file
+        """
+        segments = self.read_segments()
+        if not segments:
+            raise ValueError("No live segments to export")
+        list_path = os.path.join(self.output_dir, "concat.txt")
+        with open(list_path, "w") as f:
+            for name, _ in segments:
+                f.write(f"file '{os.path.join(self.output_dir, name)}'\n")
+        args = ["-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            args += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0",
+                     "-c:a", "copy" if copy_audio else "aac", "-shortest"]
+        args += ["-c:v", "copy", "-movflags", "+faststart", output_path]
+        try:
+            run_ffmpeg(args)
+        finally:
+            os.remove(list_path)
+        return output_path
+
+    def read_segments(self) -> List[Tuple[str, float]]:
+        """Get the finished segments as (file name, duration) pairs."""
+        path = os.path.join(self.output_dir, SEGMENT_LIST_NAME)
+        if not os.path.exists(path):
+            return []
+        segments = []
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) >= 3:
+                    segments.append((row[0], float(row[2]) - float(row[1])))
+        return segments
+
+    def _open(self, width: int, height: int):
+        """Start the segmenting encoder for frames of the given size."""
+        keyframe_interval = f"{self.segment_seconds:.6f}"
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}", "-r", str(self.fps),
+            "-i", "pipe:",
+            # yuv420p needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p",
+            *self.profile.ffmpeg_args(self.fps), "-threads", str(self.profile.threads()),
+            # A keyframe at every segment boundary so each segment plays on its own
+            "-force_key_frames", f"expr:gte(t,n_forced*{keyframe_interval})",
+            "-f", "segment", "-segment_time", keyframe_interval,
+            "-segment_format", "mpegts",
+            "-segment_list", os.path.join(self.output_dir, SEGMENT_LIST_NAME),
+            "-segment_list_type", "csv", "-segment_list_flags", "+live",
+            os.path.join(self.output_dir, SEGMENT_PATTERN)
+        ]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _run(self):
+        """Writer loop: feed frames to ffmpeg and refresh the playlist."""
+        while True:
+            try:
+                frame = self._queue.get(timeout=PLAYLIST_REFRESH_SECONDS)
+            except queue.Empty:
+                frame = False
+            if frame is None:
+                break
+            # After a failure frames are still drained so finish() cannot block
+            if self._error:
+                continue
+            try:
+                if frame is not False:
+                    self._write_frame(*frame)
+                self._refresh_playlist()
+            except Exception as e:
+                self._error = str(e)
+                print(f"Live output error: {e}")
+        self._close()
+
+    def _write_frame(self, frame: Optional[np.ndarray], skipped: int = 0):
+        """Annotate and encode one frame after repeating the previous one for each skipped frame.
+
+        Frames skipped before anything was written repeat this frame instead,
+        so the output still starts when the capture did.
+
+        Args:
+            frame: RGB frame, or None to only write the repeats
+            skipped: Number of frames dropped before this one
+        """
+        if self._previous is not None:
+            for _ in range(skipped):
+                self._pipe(self._previous)
+            self.frames_repeated += skipped
+            skipped = 0
+        if frame is None:
+            return
+        if self._process is None:
+            self._open(frame.shape[1], frame.shape[0])
+        if self.annotation_manager is not None:
+            frame = self.annotation_manager.draw_annotations(frame, (self.frames_written + skipped) / self.fps)
+        self._previous = np.ascontiguousarray(frame, dtype=np.uint8)
+        for _ in range(skipped + 1):
+            self._pipe(self._previous)
+        self.frames_repeated += skipped
+
+    def _pipe(self, frame: np.ndarray):
+        """Send one frame to the encoder."""
+        try:
+            self._process.stdin.write(frame.data)
+        except (BrokenPipeError, OSError):
+            raise RuntimeError(self._process.stderr.read().decode(errors="replace").strip())
+        self.frames_written += 1
+
+    def _close(self):
+        """Flush the encoder so the last segment is listed."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        error = process.stderr.read().decode(errors="replace").strip()
+        if process.wait() != 0 and not self._error:
+            self._error = error
+
+    def _refresh_playlist(self):
+        """Rewrite the rolling playlist when a new segment has finished."""
+        segments = self.read_segments()
+        if len(segments) != self._segment_count:
+            self._segment_count = len(segments)
+            self._write_playlist(segments, final=False)
+
+    def _write_playlist(self, segments: List[Tuple[str, float]], final: bool):
+        """Write an HLS playlist atomically.
+
+        Args:
+            segments: All finished segments in order
+            final: Write a complete VOD playlist instead of the live window
+        """
+        first = 0 if final else max(0, len(segments) - self.window_segments)
+        listed = segments[first:]
+        target = max([self.segment_seconds] + [duration for _, duration in listed])
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{math.ceil(target)}",
+            f"#EXT-X-MEDIA-SEQUENCE:{first}",
+        ]
+        if final:
+            lines.append("#EXT-X-PLAYLIST-TYPE:VOD")
+        for name, duration in listed:
+            lines += [f"#EXTINF:{duration:.3f},", name]
+        if final:
+            lines.append("#EXT-X-ENDLIST")
+
+        temp_path = f"{self.playlist_path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, self.playlist_path)
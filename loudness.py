@@ -0,0 +1,275 @@
+import json
+import os
+import numpy as np
+from dataclasses import dataclass, asdict
+from collections import deque
+from typing import Optional
+
+# EBU R128 / ITU-R BS.1770 constants
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+LRA_RELATIVE_GATE_LU = -20.0
+SUBBLOCK_SECONDS = 0.1    # Gating step (75% overlap of 400 ms blocks)
+MOMENTARY_SUBBLOCKS = 4   # 400 ms momentary window
+SHORT_TERM_SUBBLOCKS = 30 # 3 s short-term window
+
+def power_to_lufs(power):
+    """Convert a weighted mean-square power to LUFS."""
+    with np.errstate(divide='ignore'):
+        return -0.691 + 10.0 * np.log10(power)
+
+def k_weighting_coefficients(sample_rate: int):
+    """Get the combined K-weighting filter (pre-filter and RLB high-pass).
+
+    Args:
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        (b, a) coefficients of the 4th order filter
+    """
+    # High shelf modelling the acoustic effect of the head
+    f0 = 1681.974450955533
+    gain_db = 3.999843853973347
+    q = 0.7071752369554196
+    k = np.tan(np.pi * f0 / sample_rate)
+    vh = 10.0 ** (gain_db / 20.0)
+    vb = vh ** 0.4996667741545416
+    a0 = 1.0 + k / q + k * k
+    shelf_b = [(vh + vb * k / q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0]
+    shelf_a = [1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+
+    # Revised low-frequency B-curve high-pass
+    f0 = 38.13547087602444
+    q = 0.5003270373238773
+    k = np.tan(np.pi * f0 / sample_rate)
+    a0 = 1.0 + k / q + k * k
+    highpass_b = [1.0, -2.0, 1.0]
+    highpass_a = [1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0]
+
+    return np.convolve(shelf_b, highpass_b), np.convolve(shelf_a, highpass_a)
+
+class BlockIIRFilter:
+    def __init__(self, b, a, channels: int, block_size: int = 256):
+        """Initialize a stateful IIR filter that processes whole blocks with matrix products.
+
+        The filter is expressed in state-space form so that a block of L samples
+        is y = T @ x + O @ s, where T is the Toeplitz matrix of the impulse
+        response and s the state carried over from the previous block. This
+        avoids a per-sample Python loop.
+
+        Args:
+            b: Numerator coefficients
+            a: Denominator coefficients
+            channels: Number of channels filtered in parallel
+            block_size: Internal block length
+        """
+        b = np.asarray(b, dtype=np.float64) / a[0]
+        a = np.asarray(a, dtype=np.float64) / a[0]
+        order = max(len(a), len(b)) - 1
+        b = np.pad(b, (0, order + 1 - len(b)))
+        a = np.pad(a, (0, order + 1 - len(a)))
+
+        # Transposed direct form II state-space matrices
+        A = np.zeros((order, order))
+        A[:, 0] = -a[1:]
+        A[:-1, 1:] = np.eye(order - 1)
+        B = b[1:] - a[1:] * b[0]
+        C = np.zeros(order)
+        C[0] = 1.0
+        D = b[0]
+
+        L = block_size
+        powers = [np.eye(order)]
+        for _ in range(L):
+            powers.append(A @ powers[-1])
+
+        impulse = np.empty(L)
+        impulse[0] = D
+        for n in range(1, L):
+            impulse[n] = C @ powers[n - 1] @ B
+        idx = np.arange(L)
+        lags = idx[:, None] - idx[None, :]
+        self._toeplitz = np.where(lags >= 0, impulse[np.clip(lags, 0, None)], 0.0)
+        self._observe = np.stack([C @ powers[n] for n in range(L)])
+        self._reach = np.stack([powers[L - 1 - k] @ B for k in range(L)], axis=1)
+        self._powers = powers
+        self.block_size = L
+        self.state = np.zeros((order, channels))
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Filter a block of samples.
+
+        Args:
+            x: Array of shape (frames, channels)
+
+        Returns:
+            Filtered array of the same shape
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.empty_like(x)
+        L = self.block_size
+        for start in range(0, len(x), L):
+            u = x[start:start + L]
+            m = len(u)
+            y[start:start + m] = self._toeplitz[:m, :m] @ u + self._observe[:m] @ self.state
+            self.state = self._powers[m] @ self.state + self._reach[:, L - m:] @ u
+        return y
+
+class TruePeakDetector:
+    def __init__(self, sample_rate: int, channels: int, taps_per_phase: int = 12):
+        """Initialize an oversampling true-peak detector.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of channels
+            taps_per_phase: Interpolation filter length per polyphase branch
+        """
+        self.factor = 4 if sample_rate < 96000 else 2 if sample_rate < 192000 else 1
+        n = np.arange(self.factor * taps_per_phase) - (self.factor * taps_per_phase - 1) / 2.0
+        taps = np.sinc(n / self.factor) * np.hanning(len(n))
+        # Each phase is reversed so a sliding-window dot product performs the convolution
+        self._phases = np.stack([taps[p::self.factor][::-1] for p in range(self.factor)], axis=1)
+        self._history = np.zeros((taps_per_phase - 1, channels))
+        self.peak = 0.0
+
+    def process(self, x: np.ndarray):
+        """Update the running true peak with a block of samples."""
+        if self.factor == 1:
+            self.peak = max(self.peak, float(np.max(np.abs(x), initial=0.0)))
+            return
+        padded = np.concatenate([self._history, x], axis=0)
+        windows = np.lib.stride_tricks.sliding_window_view(padded, len(self._phases), axis=0)
+        interpolated = windows @ self._phases
+        self.peak = max(self.peak, float(np.max(np.abs(interpolated), initial=0.0)))
+        self._history = padded[-len(self._history):]
+
+@dataclass
+class LoudnessStats:
+    """Class to store the loudness analysis of a recording."""
+    integrated_lufs: Optional[float]
+    true_peak_dbtp: Optional[float]
+    loudness_range_lu: float
+    sample_rate: int
+    duration: float
+
+class LoudnessMeter:
+    def __init__(self, sample_rate: int, channels: int):
+        """Initialize a streaming EBU R128 loudness meter.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of channels
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        b, a = k_weighting_coefficients(sample_rate)
+        self._filter = BlockIIRFilter(b, a, channels)
+        self._true_peak = TruePeakDetector(sample_rate, channels)
+        # In 5.1 order (L, R, C, LFE, Ls, Rs) LFE is ignored and surrounds get +1.5 dB
+        self._weights = np.ones(channels)
+        if channels == 6:
+            self._weights[3] = 0.0
+            self._weights[4:6] = 1.41
+        self._hop = int(round(SUBBLOCK_SECONDS * sample_rate))
+        self._partial = np.zeros(channels)
+        self._partial_count = 0
+        self._subblocks = deque(maxlen=SHORT_TERM_SUBBLOCKS)
+        self._gating_blocks = []
+        self._short_term_blocks = []
+        self.samples = 0
+        self.momentary_lufs = float('-inf')
+
+    def process(self, block: np.ndarray):
+        """Analyze one block of captured audio.
+
+        Args:
+            block: Array of shape (frames, channels), float or integer samples
+        """
+        x = np.asarray(block)
+        if x.dtype.kind in 'iu':
+            x = x / float(np.iinfo(x.dtype).max + 1)
+        x = x.astype(np.float64, copy=False).reshape(len(x), -1)
+        self.samples += len(x)
+
+        self._true_peak.process(x)
+        squared = np.square(self._filter.process(x))
+
+        start = 0
+        while start < len(squared):
+            take = min(self._hop - self._partial_count, len(squared) - start)
+            self._partial += squared[start:start + take].sum(axis=0)
+            self._partial_count += take
+            start += take
+            if self._partial_count == self._hop:
+                self._close_subblock()
+
+    def _close_subblock(self):
+        """Finish a 100 ms sub-block and update the gating block lists."""
+        self._subblocks.append(self._partial / self._hop)
+        self._partial = np.zeros(self.channels)
+        self._partial_count = 0
+
+        recent = list(self._subblocks)
+        if len(recent) >= MOMENTARY_SUBBLOCKS:
+            power = float(self._weights @ np.mean(recent[-MOMENTARY_SUBBLOCKS:], axis=0))
+            self.momentary_lufs = float(power_to_lufs(power))
+            if self.momentary_lufs > ABSOLUTE_GATE_LUFS:
+                self._gating_blocks.append(power)
+        if len(recent) == SHORT_TERM_SUBBLOCKS:
+            power = float(self._weights @ np.mean(recent, axis=0))
+            if power_to_lufs(power) > ABSOLUTE_GATE_LUFS:
+                self._short_term_blocks.append(power)
+
+    def integrated_loudness(self) -> Optional[float]:
+        """Get the gated integrated loudness in LUFS, or None for silence."""
+        powers = np.asarray(self._gating_blocks)
+        if not len(powers):
+            return None
+        threshold = power_to_lufs(powers.mean()) + RELATIVE_GATE_LU
+        gated = powers[power_to_lufs(powers) > threshold]
+        return float(power_to_lufs(gated.mean())) if len(gated) else None
+
+    def loudness_range(self) -> float:
+        """Get the loudness range (LRA) in LU."""
+        powers = np.asarray(self._short_term_blocks)
+        if not len(powers):
+            return 0.0
+        threshold = power_to_lufs(powers.mean()) + LRA_RELATIVE_GATE_LU
+        levels = power_to_lufs(powers[power_to_lufs(powers) > threshold])
+        if not len(levels):
+            return 0.0
+        return float(np.percentile(levels, 95) - np.percentile(levels, 10))
+
+    def true_peak(self) -> Optional[float]:
+        """Get the true peak in dBTP, or None for digital silence."""
+        peak = self._true_peak.peak
+        return float(20.0 * np.log10(peak)) if peak > 0 else None
+
+    def result(self) -> LoudnessStats:
+        """Get the loudness statistics measured so far."""
+        return LoudnessStats(
+            integrated_lufs=self.integrated_loudness(),
+            true_peak_dbtp=self.true_peak(),
+            loudness_range_lu=self.loudness_range(),
+            sample_rate=self.sample_rate,
+            duration=self.samples / self.sample_rate
+        )
+
+def loudness_sidecar_path(video_path: str) -> str:
+    """Get the sidecar path that stores loudness statistics for a video."""
+    return os.path.splitext(video_path)[0] + ".loudness.json"
+
+def write_loudness_sidecar(stats: LoudnessStats, path: str) -> str:
+    """Save loudness statistics to a JSON sidecar file.
+
+    Returns:
+        Path to the sidecar file
+    """
+    with open(path, 'w') as f:
+        json.dump(asdict(stats), f, indent=2)
+    return path
+
+def read_loudness_sidecar(path: str) -> LoudnessStats:
+    """Load loudness statistics from a JSON sidecar file."""
+    with open(path) as f:
+        return LoudnessStats(**json.load(f))
@@ -1,9 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, colorchooser
+import os
 import threading
 from recorder import Recorder
+from export_scheduler import ExportScheduler, PRIORITY_HIGH
+from utils.file_utils import get_default_save_directory
 import tkinter.messagebox as messagebox
 
+# Refresh interval of the mic level meter
+LEVEL_METER_INTERVAL_MS = 50
+
+# Refresh interval of the export status line
+EXPORT_STATUS_INTERVAL_MS = 500
+
+# Exports encoded at the same time
+EXPORT_WORKERS = 2
+
 class RegionSelector:
     def __init__(self, callback):
         """Initialize region selector.
@@ -79,6 +91,20 @@ class ScreenRecorderGUI:
         self.selected_region = None  # Add this to track region
         self.setup_ui()
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Recordings are encoded by queued export jobs
+        self.export_scheduler = ExportScheduler(
+            workers=EXPORT_WORKERS,
+            journal_path=os.path.join(get_default_save_directory(), "export_jobs.json")
+        )
+        self.export_scheduler.register_handler(
+            "encode",
+            lambda job: self.recorder.save_recording(job.payload["capture"], progress_callback=job.report)
+        )
+        self.reported_jobs = set()
+        self.export_scheduler.resume_journal()
+        self.export_scheduler.start()
+        self.update_export_status()
 
         # Style config
         style = ttk.Style()
@@ -89,6 +115,14 @@ class ScreenRecorderGUI:
     def on_close(self):
         if self.recording:
             self.stop_recording()
+        active = self.export_scheduler.active_jobs()
+        if active and not messagebox.askyesno(
+            "Exports Running",
+            f"{len(active)} export(s) are still running. Quit anyway?\n"
+            "Unfinished trims and merges resume next time; unsaved recordings are lost."
+        ):
+            return
+        self.export_scheduler.shutdown(wait=False)
         self.root.destroy()
 
     def toggle_recording(self):
@@ -155,6 +189,17 @@ class ScreenRecorderGUI:
             variable=self.record_audio_var
         ).grid(row=0, column=1, padx=5, pady=5)
         
+        # Audio level meter
+        ttk.Label(control_frame, text="Mic Level:").grid(row=1, column=0, padx=5, pady=5)
+        self.level_meter = ttk.Progressbar(
+            control_frame,
+            orient=tk.HORIZONTAL,
+            length=150,
+            mode='determinate',
+            maximum=60
+        )
+        self.level_meter.grid(row=1, column=1, padx=5, pady=5, sticky=(tk.W, tk.E))
+        
         # Annotation Frame
         annotation_frame = ttk.LabelFrame(main_frame, text="Text Annotations", padding="5")
         annotation_frame.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky=(tk.W, tk.E))
@@ -216,6 +261,15 @@ class ScreenRecorderGUI:
         self.status_label = ttk.Label(status_frame, text="Ready")
         self.status_label.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
         
+        # Export progress
+        self.export_label = ttk.Label(status_frame, text="No exports running")
+        self.export_label.grid(row=2, column=0, padx=5, pady=5)
+        ttk.Button(
+            status_frame,
+            text="Cancel Export",
+            command=self.cancel_export
+        ).grid(row=2, column=1, padx=5, pady=5)
+        
         # Click position label
         self.position_label = ttk.Label(status_frame, text="Click position for annotation: None")
         self.position_label.grid(row=1, column=0, columnspan=2, padx=5, pady=5)
@@ -223,6 +277,49 @@ class ScreenRecorderGUI:
         # Bind click event for annotation position
         self.root.bind('<Button-1>', self.on_click)
         
+    def update_level_meter(self):
+        """Refresh the mic level meter while recording."""
+        if not self.recording:
+            self.level_meter['value'] = 0
+            return
+            
+        levels = self.recorder.get_audio_levels()
+        if levels:
+            # Show the loudest channel over a 60 dB range
+            self.level_meter['value'] = max(0.0, max(levels.peak_db) + 60.0)
+        self.root.after(LEVEL_METER_INTERVAL_MS, self.update_level_meter)
+        
+    def update_export_status(self):
+        """Refresh the export progress line and report finished exports."""
+        jobs = self.export_scheduler.active_jobs()
+        if jobs:
+            job = jobs[0]
+            eta = self.export_scheduler.eta(job.job_id) or 0.0
+            text = f"Exporting {job.label}: {job.progress:.0%}, about {int(eta // 60)}:{int(eta % 60):02d} left"
+            if len(jobs) > 1:
+                text += f" ({len(jobs) - 1} queued)"
+            self.export_label.configure(text=text)
+        else:
+            self.export_label.configure(text="No exports running")
+            
+        for job in list(self.export_scheduler.jobs.values()):
+            if job.job_id in self.reported_jobs or job.status in ("queued", "running"):
+                continue
+            self.reported_jobs.add(job.job_id)
+            if job.status == "done":
+                self.status_label.configure(text=f"Saved to: {job.result}")
+            elif job.status == "failed":
+                self.status_label.configure(text=f"Error: {job.error}")
+            else:
+                self.status_label.configure(text=f"Export of {job.label} cancelled")
+        self.root.after(EXPORT_STATUS_INTERVAL_MS, self.update_export_status)
+        
+    def cancel_export(self):
+        """Cancel the export that runs first."""
+        jobs = self.export_scheduler.active_jobs()
+        if jobs:
+            self.export_scheduler.cancel(jobs[0].job_id)
+            
     def on_mode_change(self, event=None):
         """Handle capture mode change."""
         mode = self.capture_mode.get()
@@ -342,6 +439,7 @@ class ScreenRecorderGUI:
                 target=lambda: self.recorder.start_recording(**settings),
                 daemon=True
             ).start()
+            self.update_level_meter()
         except Exception as e:
             self.recording = False
             self.root.deiconify()
@@ -357,11 +455,19 @@ class ScreenRecorderGUI:
         
         def save_recording():
             try:
-                video_path = self.recorder.stop_recording()
-                if video_path:
-                    self.status_label.configure(text=f"Saved to: {video_path}")
-                else:
+                self.recorder.stop_recording(save=False)
+                capture = self.recorder.take_capture()
+                if not capture.frames:
                     raise Exception("Failed to save recording")
+                # A new recording is encoded before queued trims and merges
+                self.export_scheduler.submit(
+                    "encode",
+                    priority=PRIORITY_HIGH,
+                    label="recording",
+                    media_seconds=len(capture.frames) / self.recorder.fps,
+                    payload={"capture": capture}
+                )
+                self.status_label.configure(text="Recording queued for export")
             except Exception as e:
                 self.status_label.configure(text=f"Error: {str(e)}")
             finally:
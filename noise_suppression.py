@@ -0,0 +1,151 @@
+import time
+import numpy as np
+
+SUPPRESSION_MODES = ("subtract", "gate")
+
+class NoiseSuppressor:
+    def __init__(self, sample_rate: int, channels: int, mode: str = "subtract",
+                 frame_size: int = 1024, learn_seconds: float = 1.0,
+                 reduction_db: float = 20.0, oversubtraction: float = 1.5,
+                 gate_threshold_db: float = 6.0):
+        """Initialize a streaming FFT noise suppressor.
+
+        The noise spectrum is learned from the first learn_seconds of audio
+        (assumed to be room/fan noise), after which every frame is either
+        spectrally subtracted or gated per frequency bin. Frames use a
+        square-root Hann window with 50% overlap-add, so the unprocessed
+        signal is reconstructed exactly.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of channels
+            mode: "subtract" for spectral subtraction, "gate" for a spectral gate
+            frame_size: FFT size in samples (even)
+            learn_seconds: Duration used to learn the noise profile
+            reduction_db: Maximum attenuation applied to noise, in dB
+            oversubtraction: Noise estimate multiplier for spectral subtraction
+            gate_threshold_db: Level above the noise floor that opens the gate
+        """
+        if mode not in SUPPRESSION_MODES:
+            raise ValueError(f"Unsupported noise suppression mode: {mode}")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.mode = mode
+        self.frame_size = frame_size
+        self.hop = frame_size // 2
+        self.oversubtraction = oversubtraction
+        self.floor = 10.0 ** (-reduction_db / 20.0)
+        self.gate_threshold = 10.0 ** (gate_threshold_db / 10.0)
+        self._window = np.sqrt(np.hanning(frame_size + 1)[:-1]).astype(np.float32)
+
+        self._learn_frames = max(1, int(learn_seconds * sample_rate / self.hop))
+        self._noise_sum = np.zeros((channels, frame_size // 2 + 1))
+        self._noise_frames = 0
+        self._noise_power = None
+
+        # Prime with one hop of silence so the first output hop is fully reconstructed
+        self._input = np.zeros((channels, self.hop), dtype=np.float32)
+        self._tail = np.zeros((channels, self.hop), dtype=np.float32)
+        self._skip = self.hop
+
+        self._samples_in = 0
+        self._samples_out = 0
+
+        # Metrics
+        self.cpu_seconds = 0.0
+        self.audio_seconds = 0.0
+
+    @property
+    def learning(self) -> bool:
+        """Whether the noise profile is still being learned."""
+        return self._noise_power is None
+
+    @property
+    def real_time_factor(self) -> float:
+        """CPU time spent per second of audio (below 1.0 is faster than real time)."""
+        return self.cpu_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    def metrics(self) -> dict:
+        """Get CPU cost metrics for this filter stage."""
+        return {
+            "mode": self.mode,
+            "learning": self.learning,
+            "cpu_seconds": self.cpu_seconds,
+            "audio_seconds": self.audio_seconds,
+            "real_time_factor": self.real_time_factor,
+        }
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Filter one block.
+
+        Args:
+            block: Float array of shape (frames, channels)
+
+        Returns:
+            Filtered float32 array; its length may differ from the input by
+            up to one hop because output is produced in whole hops
+        """
+        started = time.thread_time()
+        x = np.asarray(block, dtype=np.float32).reshape(len(block), self.channels)
+        self.audio_seconds += len(x) / self.sample_rate
+        self._samples_in += len(x)
+
+        self._input = np.concatenate([self._input, x.T], axis=1)
+        count = (self._input.shape[1] - self.frame_size) // self.hop + 1
+        if count <= 0:
+            self.cpu_seconds += time.thread_time() - started
+            return np.zeros((0, self.channels), dtype=np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(
+            self._input, self.frame_size, axis=1
+        )[:, ::self.hop][:, :count]
+        spectrum = np.fft.rfft(frames * self._window, axis=-1)
+        spectrum *= self._gains(spectrum)
+        output_frames = np.fft.irfft(spectrum, n=self.frame_size, axis=-1).astype(np.float32)
+        output_frames *= self._window
+
+        # Overlap-add: each output hop is the first half of a frame plus the
+        # second half of the frame before it
+        previous = np.concatenate([self._tail[:, None, :], output_frames[:, :-1, self.hop:]], axis=1)
+        output = (output_frames[:, :, :self.hop] + previous).reshape(self.channels, -1)
+        self._tail = output_frames[:, -1, self.hop:]
+        self._input = self._input[:, count * self.hop:]
+
+        if self._skip:
+            dropped = min(self._skip, output.shape[1])
+            output = output[:, dropped:]
+            self._skip -= dropped
+
+        self._samples_out += output.shape[1]
+        self.cpu_seconds += time.thread_time() - started
+        return np.ascontiguousarray(output.T)
+
+    def _gains(self, spectrum: np.ndarray) -> np.ndarray:
+        """Compute per-bin gains, learning the noise profile first."""
+        power = np.square(np.abs(spectrum))
+        gains = np.ones(power.shape, dtype=np.float32)
+
+        # Frames used for learning pass through unchanged
+        learned = 0
+        if self.learning:
+            learned = min(self._learn_frames - self._noise_frames, power.shape[1])
+            self._noise_sum += power[:, :learned].sum(axis=1)
+            self._noise_frames += learned
+            if self._noise_frames < self._learn_frames:
+                return gains
+            self._noise_power = (self._noise_sum / self._noise_frames)[:, None, :]
+
+        power = power[:, learned:]
+        if self.mode == "subtract":
+            ratio = 1.0 - self.oversubtraction * self._noise_power / np.maximum(power, 1e-20)
+            gains[:, learned:] = np.sqrt(np.maximum(ratio, self.floor ** 2))
+        else:
+            gains[:, learned:] = np.where(power > self._noise_power * self.gate_threshold, 1.0, self.floor)
+        return gains
+
+    def flush(self) -> np.ndarray:
+        """Push the buffered samples out as output."""
+        pending = self._samples_in - self._samples_out
+        padding = np.zeros((self.frame_size, self.channels), dtype=np.float32)
+        return self.process(padding)[:max(0, pending)]
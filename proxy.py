@@ -0,0 +1,159 @@
+import os
+import queue
+import shutil
+import threading
+import cv2
+import numpy as np
+from typing import Optional
+from annotations import AnnotationManager
+from encoders import FFmpegPipeEncoder, get_encoding_profile
+from utils.media_utils import run_ffmpeg
+
+# Maximum width of proxy files; narrower videos keep their size
+PROXY_WIDTH = 960
+
+# Encoding profile of proxy files
+PROXY_PROFILE = "proxy"
+
+# Frames buffered between the capture thread and the live proxy encoder
+PROXY_QUEUE_FRAMES = 120
+
+def proxy_sidecar_path(video_path: str) -> str:
+    """Get the path of the proxy file that belongs to a video."""
+    return os.path.splitext(video_path)[0] + ".proxy.mp4"
+
+def find_proxy(video_path: str) -> Optional[str]:
+    """Get the proxy of a video, or None if it has none."""
+    path = proxy_sidecar_path(video_path)
+    return path if os.path.exists(path) else None
+
+def proxy_size(width: int, height: int, max_width: int = PROXY_WIDTH) -> tuple:
+    """Get the (even) proxy dimensions for a video size, keeping the aspect ratio."""
+    scale = min(1.0, max_width / width)
+    return (max(2, round(width * scale / 2) * 2), max(2, round(height * scale / 2) * 2))
+
+class ProxyWriter:
+    def __init__(self, output_path: str, fps: float = 30.0, max_width: int = PROXY_WIDTH,
+                 annotation_manager: Optional[AnnotationManager] = None):
+        """Initialize a live proxy encoder for a recording in progress.
+
+        Frames are downscaled and encoded with the short-GOP proxy profile
+        on a writer thread. When the writer falls behind, a frame is
+        repeated in place of each one that could not be queued, so the
+        proxy keeps the timing of the capture.
+
+        Args:
+            output_path: Path of the proxy file
+            fps: Frames per second of the capture
+            max_width: Maximum proxy width
+            annotation_manager: Optional annotations drawn onto the frames
+        """
+        self.output_path = output_path
+        self.fps = fps
+        self.max_width = max_width
+        self.annotation_manager = annotation_manager
+        self.frames_repeated = 0
+        self._encoder = FFmpegPipeEncoder(output_path, fps=fps, profile=get_encoding_profile(PROXY_PROFILE))
+        self._queue = queue.Queue(maxsize=PROXY_QUEUE_FRAMES)
+        self._skipped = 0
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="ProxyWriter-Thread", daemon=True)
+        self._thread.start()
+
+    def push_frame(self, frame: np.ndarray):
+        """Queue a captured frame without blocking the capture thread."""
+        try:
+            self._queue.put_nowait((frame, self._skipped))
+            self._skipped = 0
+        except queue.Full:
+            self._skipped += 1
+
+    def finish(self) -> str:
+        """Encode the remaining frames and close the proxy.
+
+        Returns:
+            Path to the proxy file
+        """
+        if self._skipped:
+            # Frames dropped at the very end repeat the last one too
+            self._queue.put((None, self._skipped))
+            self._skipped = 0
+        self._queue.put(None)
+        self._thread.join()
+        if self._error:
+            raise RuntimeError(f"Proxy encoding failed: {self._error}")
+        return self.output_path
+
+    def save(self, output_path: str, audio_path: Optional[str] = None, copy_audio: bool = True) -> str:
+        """Move the finished proxy next to its video, muxing in the audio.
+
+        Args:
+            output_path: Final path of the proxy
+            audio_path: Optional audio file to mux into the proxy
+            copy_audio: Copy the audio stream as is instead of encoding it to AAC
+
+        Returns:
+            Path to the proxy file
+        """
+        if audio_path:
+            run_ffmpeg([
+                "-i", self.output_path, "-i", audio_path,
+                "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy",
+                "-c:a", "copy" if copy_audio else "aac", "-shortest",
+                "-movflags", "+faststart", output_path
+            ])
+            os.remove(self.output_path)
+        else:
+            shutil.move(self.output_path, output_path)
+        self.output_path = output_path
+        return output_path
+
+    def _run(self):
+        """Writer loop: downscale and encode queued frames."""
+        previous = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            # After a failure frames are still drained so finish() cannot block
+            if self._error:
+                continue
+            frame, skipped = item
+            try:
+                if previous is not None:
+                    for _ in range(skipped):
+                        self._encoder.write(previous)
+                    self.frames_repeated += skipped
+                    skipped = 0
+                if frame is None:
+                    continue
+                # Frames skipped before the first one repeat it, so the proxy starts with the capture
+                previous = self._prepare(frame, skipped)
+                if self._encoder.size is None:
+                    self._encoder.open(previous.shape[1], previous.shape[0])
+                for _ in range(skipped + 1):
+                    self._encoder.write(previous)
+                self.frames_repeated += skipped
+            except Exception as e:
+                self._error = str(e)
+                print(f"Proxy encoding error: {e}")
+        try:
+            self._encoder.close()
+        except RuntimeError as e:
+            self._error = self._error or str(e)
+
+    def _prepare(self, frame: np.ndarray, skipped: int = 0) -> np.ndarray:
+        """Annotate a frame at full size, then downscale it.
+
+        Args:
+            frame: RGB frame
+            skipped: Number of frames dropped before this one that it will stand in for
+        """
+        if self.annotation_manager is not None:
+            at_time = (self._encoder.frames_written + skipped) / self.fps
+            frame = self.annotation_manager.draw_annotations(frame, at_time)
+        height, width = frame.shape[:2]
+        size = proxy_size(width, height, self.max_width)
+        if size == (width, height):
+            return frame
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
@@ -1,26 +1,127 @@
 from screen_capture import ScreenRecorder
 from audio_capture import AudioRecorder
 from video_processing import VideoProcessor
-from utils.file_utils import generate_filename
+from background_transcode import BackgroundTranscoder
+from live_output import LiveSegmenter
+from proxy import ProxyWriter, proxy_sidecar_path
+from seek_index import SeekIndex
+from segment_cache import SegmentCache
+from waveform import waveform_sidecar_path
+from utils.file_utils import generate_filename, get_cache_directory
+from loudness import write_loudness_sidecar, loudness_sidecar_path
+from silence_detection import StaticFrameDetector, find_removable_ranges
 import threading
 import time
 import os
-from typing import Tuple, Optional
+import shutil
+from pathlib import Path
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Tuple, Optional
+
+@dataclass
+class CapturedRecording:
+    """Data of one finished capture, ready to be encoded."""
+    frames: list
+    audio_data: Optional[object] = None
+    encoded_audio_path: Optional[str] = None
+    loudness: Optional[object] = None  # LoudnessStats when loudness is measured
+    waveform: Optional[object] = None  # Waveform pyramid when one is built
+    live_output: Optional[LiveSegmenter] = None  # Finished live segments to save from
+    proxy: Optional[ProxyWriter] = None  # Finished live proxy to save next to the video
 
 class Recorder:
-    def __init__(self, fps=30.0, sample_rate=44100):
+    def __init__(self, fps=30.0, sample_rate=44100, audio_codec=None, measure_loudness=False,
+                 detect_dead_air=False, sample_format="float32", noise_suppression=None,
+                 encoding_profile=None, fast_intermediate=False, export_formats=None,
+                 live_output_dir=None, segment_seconds=4.0, live_window=6, live_mp4=True,
+                 thumbnails=False, waveform=False, proxy=None, incremental_export=False):
         """Initialize the recorder with both screen and audio capabilities.
         
         Args:
             fps: Frames per second for video
             sample_rate: Sample rate for audio in Hz
+            audio_codec: Optional codec ("aac" or "opus") to compress audio
+                live during capture
+            measure_loudness: Whether to write a loudness sidecar
+                (<video>.loudness.json) next to each recording
+            detect_dead_air: Whether to find silent, static stretches that
+                remove_dead_air() can cut out
+            sample_format: Audio capture format ("int16", "int24" or "float32")
+            noise_suppression: Optional microphone noise filter ("subtract" or "gate")
+            encoding_profile: Video encoding profile ("capture-fast", "archive-small"
+                or "share-balanced"); None uses the default
+            fast_intermediate: Save a lossless intermediate with minimal CPU and
+                transcode it to the encoding profile in the background; the
+                transcode pauses while another recording is running. The
+                intermediate (High 4:4:4 Predictive H.264) is for editing only;
+                most players and browsers cannot play it
+            export_formats: Optional extra containers ("mov", "mkv", "avi") written
+                next to each MP4 by remuxing, without re-encoding
+            live_output_dir: Optional directory in which each recording gets a
+                folder of HLS segments and a rolling playlist while it runs
+            segment_seconds: Duration of the live segments
+            live_window: Number of segments in the live playlist
+            live_mp4: Save the recording by joining the live segments (stream
+                copy) instead of encoding the frames again; there is then no
+                intermediate, so it cannot be combined with fast_intermediate
+            thumbnails: Write a poster frame and timeline sprite sheet next to
+                each recording, taken from the captured frames
+            waveform: Build an audio waveform pyramid while capturing and
+                save it next to each recording (<video>.waveform)
+            proxy: Optional low-resolution editing copy (<video>.proxy.mp4) made
+                "live" from the captured frames or in the "background" after saving
+            incremental_export: Encode recordings as cached segments, so saving
+                again after editing annotations only re-encodes the segments
+                whose frames or visible annotations changed
         """
+        if proxy not in (None, "live", "background"):
+            raise ValueError(f"Unknown proxy mode: {proxy}")
+        if fast_intermediate and live_output_dir and live_mp4:
+            raise ValueError("fast_intermediate cannot be combined with live_mp4; "
+                             "pass live_mp4=False to encode an intermediate")
+        self.fps = fps
+        self.detect_dead_air = detect_dead_air
         self.screen_recorder = ScreenRecorder(fps=fps)
-        self.audio_recorder = AudioRecorder(sample_rate=sample_rate)
-        self.video_processor = VideoProcessor(fps=fps)
+        self.audio_recorder = AudioRecorder(
+            sample_rate=sample_rate,
+            encoder_codec=audio_codec,
+            measure_loudness=measure_loudness,
+            detect_silence=detect_dead_air,
+            sample_format=sample_format,
+            noise_suppression=noise_suppression,
+            build_waveform=waveform
+        )
+        self.encoding_profile = encoding_profile
+        self.fast_intermediate = fast_intermediate
+        self.video_processor = VideoProcessor(
+            fps=fps, profile="capture-lossless" if fast_intermediate else encoding_profile
+        )
+        self.transcoder = BackgroundTranscoder() if fast_intermediate or proxy == "background" else None
+        self.transcode_job = None
+        self.proxy = proxy
+        self.live_proxy = None
+        self.finished_live_proxy = None
+        self.proxy_job = None
+        self.segment_cache = None
+        if incremental_export:
+            # A fixed location bounded by the cache size, instead of a temp dir per session
+            self.segment_cache = SegmentCache(get_cache_directory("segments"))
+        self.export_formats = list(export_formats or [])
+        self.exported_paths = {}
+        self.live_output_dir = live_output_dir
+        self.segment_seconds = segment_seconds
+        self.live_window = live_window
+        self.live_mp4 = live_mp4
+        self.live_output = None
+        self.live_playlist = None
+        self.finished_live_output = None
+        self.thumbnails = thumbnails
         self.recording = False
         self.frames = []
         self.audio_data = None
+        self.encoded_audio_path = None
+        self.removable_ranges = []
         
     def start_recording(self, region=None, record_audio=True):  # Add record_audio parameter
         """Start recording screen.
@@ -34,7 +135,36 @@ class Recorder:
             
         self.recording = True
         self.frames = []
+        # Not refreshed when audio is off, so they would still hold the last capture
+        self.audio_recorder.silence_detector = None
+        self.audio_recorder.loudness = None
+        self.audio_recorder.waveform = None
+        
+        # Leave the CPU to the new capture
+        if self.transcoder:
+            self.transcoder.pause()
 
+        # Segment the capture for live viewing as it runs
+        self.finished_live_output = None
+        if self.live_output_dir:
+            self.live_output = LiveSegmenter(
+                os.path.join(self.live_output_dir, time.strftime("recording_%Y%m%d_%H%M%S")),
+                fps=self.fps,
+                segment_seconds=self.segment_seconds,
+                window_segments=self.live_window,
+                annotation_manager=self.video_processor.annotation_manager
+            )
+        self.finished_live_proxy = None
+        if self.proxy == "live":
+            self.live_proxy = ProxyWriter(
+                os.path.join(self.video_processor.temp_dir, time.strftime("proxy_%Y%m%d_%H%M%S.mp4")),
+                fps=self.fps,
+                annotation_manager=self.video_processor.annotation_manager
+            )
+        listeners = [output.push_frame for output in (self.live_output, self.live_proxy) if output]
+        if listeners:
+            self.screen_recorder.frame_listener = lambda frame: [push(frame) for push in listeners]
+            
         # Start screen recording
         self.screen_recorder.start_recording(region=region)
         
@@ -42,11 +172,15 @@ class Recorder:
         if record_audio:
             self.audio_recorder.start_recording()
         
-    def stop_recording(self):
+    def stop_recording(self, save: bool = True):
         """Stop recording and save the video file.
         
+        Args:
+            save: Encode the recording right away; when False, take_capture()
+                returns the data so it can be saved later (e.g. by an export job)
+        
         Returns:
-            Path to the saved video file
+            Path to the saved video file, or None when not saving
         """
         if not self.recording:
             return None
@@ -55,50 +189,267 @@ class Recorder:
         
         # Stop screen recording and get frames
         frames = self.screen_recorder.stop_recording()
+        self.screen_recorder.frame_listener = None
         
         # Stop audio recording if active
         audio_data = None
+        encoded_audio_path = None
         if hasattr(self, 'audio_recorder') and self.audio_recorder:
             audio_data = self.audio_recorder.stop_recording()
+            encoded_audio_path = self.audio_recorder.encoded_path
         
         # Store the captured data
         self.frames = frames
         self.audio_data = audio_data
+        self.encoded_audio_path = encoded_audio_path
+        self.removable_ranges = self._find_dead_air(frames) if self.detect_dead_air else []
+        
+        # Turn the live playlist into a VOD playlist
+        live_output, self.live_output = self.live_output, None
+        self.live_playlist = None
+        if live_output:
+            try:
+                self.live_playlist = live_output.finish()
+                if self.live_mp4:
+                    self.finished_live_output = live_output
+            except RuntimeError as e:
+                print(f"Error finishing live output: {e}")
+        live_proxy, self.live_proxy = self.live_proxy, None
+        if live_proxy:
+            try:
+                live_proxy.finish()
+                self.finished_live_proxy = live_proxy
+            except RuntimeError as e:
+                print(f"Error finishing proxy: {e}")
         
         # Save the recording
-        return self.save_recording()
+        try:
+            if not save:
+                return None
+            return self.save_recording()
+        finally:
+            if self.transcoder:
+                self.transcoder.resume()
+        
+    def _find_dead_air(self, frames):
+        """Find stretches where the audio is silent and the screen is static."""
+        video_detector = StaticFrameDetector()
+        for frame in frames:
+            video_detector.process(frame)
+        
+        audio_detector = self.audio_recorder.silence_detector
+        if audio_detector is None:
+            # No audio was captured, so only the screen decides
+            video_activity = video_detector.activity()
+            return find_removable_ranges(
+                np.zeros(len(video_activity), dtype=bool), self.fps,
+                video_activity, self.fps
+            )
+        return find_removable_ranges(
+            audio_detector.activity(), audio_detector.frame_rate,
+            video_detector.activity(), self.fps
+        )
+        
+    def remove_dead_air(self):
+        """Cut the detected dead air out of the saved recording.
+        
+        Returns:
+            Path to the shortened video file, or the original path if nothing was removed
+        """
+        if not self.removable_ranges:
+            return self.video_processor.output_path
+        return self.video_processor.remove_ranges(self.removable_ranges)
+        
+    def take_capture(self) -> CapturedRecording:
+        """Get the data of the last capture, independent of later recordings."""
+        return CapturedRecording(
+            frames=self.frames,
+            audio_data=self.audio_data,
+            encoded_audio_path=self.encoded_audio_path,
+            loudness=self.audio_recorder.loudness,
+            waveform=self.audio_recorder.waveform,
+            live_output=self.finished_live_output,
+            proxy=self.finished_live_proxy
+        )
         
-    def save_recording(self):
+    def save_recording(self, capture: Optional[CapturedRecording] = None,
+                       progress_callback: Optional[Callable[[float], None]] = None):
         """Save the recording to file.
         
+        Args:
+            capture: Captured data to save (defaults to the last capture)
+            progress_callback: Optional function called with the encoded
+                fraction; an exception raised from it (e.g. JobCancelled)
+                aborts the save, removes the partial file and is re-raised
+        
         Returns:
             Path to the saved video file
         """
-        if not self.frames:
+        if capture is None:
+            capture = self.take_capture()
+        if capture.live_output:
+            return self._save_live_recording(capture)
+        if not capture.frames:
             return None
             
         # Generate output paths
-        video_path = generate_filename(prefix="recording", extension="mp4")
+        final_path = None
+        if self.fast_intermediate:
+            final_path = generate_filename(prefix="recording", extension="mp4",
+                                           exclude=self.transcoder.pending_outputs())
+            video_path = str(Path(final_path).with_suffix(".intermediate.mp4"))
+        else:
+            video_path = generate_filename(prefix="recording", extension="mp4")
         audio_path = None
         
-        # Save audio if we have it
-        if self.audio_data is not None:
+        # Save audio if we have it; live-encoded audio is already on disk
+        if capture.encoded_audio_path:
+            audio_path = capture.encoded_audio_path
+        elif capture.audio_data is not None:
             audio_path = generate_filename(prefix="audio", extension="wav")
-            self.audio_recorder.save_audio(self.audio_data, audio_path)
+            self.audio_recorder.save_audio(capture.audio_data, audio_path)
         
-        # Create and save video
-        self.video_processor.output_path = video_path
+        # Saves may run concurrently, so each gets its own processor
+        processor = VideoProcessor(output_path=video_path, fps=self.fps,
+                                   profile=self.video_processor.profile.name)
+        processor.annotation_manager.annotations = list(self.video_processor.annotation_manager.annotations)
+        frames = capture.frames
+        callback_errors = []
+        if progress_callback:
+            frames = self._report_progress(frames, progress_callback, callback_errors)
         try:
-            result_path = self.video_processor.frames_to_video(self.frames, audio_path)
+            result_path = processor.frames_to_video(frames, audio_path, segment_cache=self.segment_cache)
+            self.video_processor.output_path = result_path
+            
+            self._write_audio_sidecars(capture, final_path or result_path)
+                
+            # The intermediate is usable right away; the final file follows
+            if self.fast_intermediate:
+                self.transcode_job = self.transcoder.submit(result_path, final_path, self.encoding_profile)
+            else:
+                self._write_seek_index(result_path)
+                self._write_exports(result_path)
+            self._write_proxy(capture, final_path or result_path, audio_path)
             
             # Clean up the temporary audio file
             if audio_path and os.path.exists(audio_path):
                 os.remove(audio_path)
+            
+            self._write_thumbnails(result_path, capture.frames)
                 
+            return result_path
+        except Exception as e:
+            if callback_errors:
+                # The caller stopped the save; leave no partial recording behind
+                if os.path.exists(video_path):
+                    os.remove(video_path)
+                shutil.rmtree(processor.temp_dir, ignore_errors=True)
+                raise callback_errors[0]
+            print(f"Error saving recording: {e}")
+            return None
+        
+    def _save_live_recording(self, capture: CapturedRecording):
+        """Save the recording by joining the live segments with the captured audio.
+        
+        Returns:
+            Path to the saved video file
+        """
+        video_path = generate_filename(prefix="recording", extension="mp4")
+        audio_path = capture.encoded_audio_path
+        if not audio_path and capture.audio_data is not None:
+            audio_path = generate_filename(prefix="audio", extension="wav")
+            self.audio_recorder.save_audio(capture.audio_data, audio_path)
+        try:
+            # Live-encoded audio is already compressed
+            result_path = capture.live_output.export_mp4(video_path, audio_path,
+                                                         copy_audio=bool(capture.encoded_audio_path))
+            self.video_processor.output_path = result_path
+            self._write_audio_sidecars(capture, result_path)
+            self._write_seek_index(result_path)
+            self._write_exports(result_path)
+            self._write_proxy(capture, result_path, audio_path)
+            self._write_thumbnails(result_path, capture.frames)
             return result_path
         except Exception as e:
             print(f"Error saving recording: {e}")
             return None
+        finally:
+            if audio_path and os.path.exists(audio_path):
+                os.remove(audio_path)
+        
+    def _write_audio_sidecars(self, capture: CapturedRecording, video_path: str):
+        """Save the loudness and waveform measured while capturing next to the video."""
+        # Store loudness next to the video so export can normalize in one pass
+        try:
+            if capture.loudness is not None:
+                write_loudness_sidecar(capture.loudness, loudness_sidecar_path(video_path))
+        except Exception as e:
+            print(f"Error writing loudness sidecar: {e}")
+        try:
+            if capture.waveform is not None:
+                capture.waveform.save(waveform_sidecar_path(video_path))
+        except Exception as e:
+            print(f"Error writing waveform: {e}")
+        
+    def _write_proxy(self, capture: CapturedRecording, video_path: str, audio_path: Optional[str]):
+        """Save the live proxy next to the video, or queue one to be encoded from it."""
+        try:
+            if capture.proxy is not None:
+                capture.proxy.save(proxy_sidecar_path(video_path), audio_path,
+                                   copy_audio=bool(capture.encoded_audio_path))
+            elif self.proxy == "background":
+                self.proxy_job = self.transcoder.submit_proxy(video_path)
+        except Exception as e:
+            print(f"Error writing proxy: {e}")
+        
+    def _write_seek_index(self, video_path: str):
+        """Index the saved video now so later seeks and trims read the sidecar."""
+        try:
+            SeekIndex.for_video(video_path)
+        except Exception as e:
+            print(f"Error writing seek index: {e}")
+        
+    def _write_exports(self, video_path: str):
+        """Remux the saved video into the extra export containers, if any."""
+        self.exported_paths = {}
+        if not self.export_formats:
+            return
+        try:
+            processor = VideoProcessor(output_path=video_path, fps=self.fps)
+            self.exported_paths = processor.export_formats(self.export_formats)
+        except Exception as e:
+            print(f"Error exporting formats: {e}")
+        
+    def _write_thumbnails(self, video_path: str, frames: list):
+        """Write thumbnails from the frames still in memory, if enabled."""
+        if not self.thumbnails or not frames:
+            return
+        try:
+            processor = VideoProcessor(output_path=video_path, fps=self.fps)
+            processor.annotation_manager.annotations = list(self.video_processor.annotation_manager.annotations)
+            processor.generate_thumbnails(frames=frames)
+        except Exception as e:
+            print(f"Error writing thumbnails: {e}")
+        
+    def _report_progress(self, frames: list, progress_callback: Callable[[float], None], errors: list):
+        """Pass frames through while reporting the encoded fraction about once per second of video.
+        
+        The encoder wraps errors raised while reading frames, so an exception
+        from the callback is also added to errors to be re-raised as is.
+        """
+        step = max(1, int(self.fps))
+        for index, frame in enumerate(frames):
+            if index % step == 0:
+                try:
+                    progress_callback(index / len(frames))
+                except Exception as e:
+                    errors.append(e)
+                    raise
+            yield frame
+        
+    def get_audio_levels(self):
+        """Get the latest microphone levels for metering, or None when idle."""
+        return self.audio_recorder.get_levels()
         
     def add_annotation(self, text: str, position: Tuple[int, int], **kwargs):
         """Add a text annotation to the video.
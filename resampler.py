@@ -0,0 +1,90 @@
+import numpy as np
+from math import gcd
+
+class PolyphaseResampler:
+    def __init__(self, input_rate: int, output_rate: int, channels: int,
+                 taps_per_phase: int = 32, beta: float = 8.0):
+        """Initialize a streaming polyphase resampler.
+
+        The rate ratio is reduced to up / down. Output sample k is computed
+        from input position k * down / up with the filter phase selected by
+        the fractional part, so only the taps that contribute are evaluated.
+        Filter history is carried between blocks, making block boundaries
+        invisible in the output.
+
+        Args:
+            input_rate: Sample rate of the incoming blocks in Hz
+            output_rate: Desired sample rate in Hz
+            channels: Number of channels
+            taps_per_phase: Filter taps per polyphase branch (quality/speed trade-off)
+            beta: Kaiser window shape parameter
+        """
+        divisor = gcd(int(input_rate), int(output_rate))
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.up = int(output_rate) // divisor
+        self.down = int(input_rate) // divisor
+        self.channels = channels
+        self.taps_per_phase = taps_per_phase
+
+        # Low-pass prototype at the lower of the two Nyquist frequencies
+        length = self.up * taps_per_phase
+        cutoff = 1.0 / max(self.up, self.down)
+        n = np.arange(length) - (length - 1) / 2.0
+        prototype = cutoff * np.sinc(cutoff * n) * np.kaiser(length, beta) * self.up
+        # phases[p, j] is the tap applied to input sample n - (taps - 1) + j for
+        # phase p, i.e. ordered oldest to newest to match sliding windows
+        self._phases = np.ascontiguousarray(
+            prototype.reshape(taps_per_phase, self.up).T[:, ::-1], dtype=np.float32
+        )
+
+        # History is kept channel-major so each filter window is contiguous
+        self._history = np.zeros((channels, taps_per_phase - 1), dtype=np.float32)
+        self._inputs_seen = 0
+        self._next_output = 0
+
+    @property
+    def passthrough(self) -> bool:
+        """Whether input and output rates are equal."""
+        return self.up == self.down
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Resample one block.
+
+        Args:
+            block: Float array of shape (frames, channels)
+
+        Returns:
+            Resampled float32 array of shape (frames * up / down, channels), give or take one
+        """
+        x = np.asarray(block, dtype=np.float32).reshape(len(block), self.channels)
+        if self.passthrough:
+            return x
+
+        history = self._history.shape[1]
+        buffer = np.concatenate([self._history, x.T], axis=1)
+        buffer_start = self._inputs_seen - history
+        self._inputs_seen += len(x)
+
+        # Outputs whose newest input sample is already available
+        last_output = (self._inputs_seen * self.up + self.down - 1) // self.down
+        k = np.arange(self._next_output, last_output, dtype=np.int64)
+        self._next_output = last_output
+        self._history = buffer[:, buffer.shape[1] - history:]
+        if not len(k):
+            return np.zeros((0, self.channels), dtype=np.float32)
+
+        position = k * self.down
+        newest = position // self.up - buffer_start
+        phase = position % self.up
+
+        # Window w ends at buffer sample w + taps - 1
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps_per_phase, axis=1)
+        selected = windows[:, newest - history]  # (channels, outputs, taps)
+        return np.einsum('ckt,kt->kc', selected, self._phases[phase], optimize=True)
+
+    def flush(self) -> np.ndarray:
+        """Push the remaining filter history out as output."""
+        if self.passthrough:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        return self.process(np.zeros((self.taps_per_phase // 2, self.channels), dtype=np.float32))
@@ -17,6 +17,7 @@ class ScreenRecorder:
         self.lock = threading.Lock()
         self._frame_times = []
         self.frame_queue = queue.Queue(maxsize=30)  # Buffer 30 frames
+        self.frame_listener = None  # Optional callable receiving each captured frame
         
         # MSS instances will be created per-thread
         self.thread_local = threading.local()
@@ -67,6 +68,8 @@ class ScreenRecorder:
                 frame = self.capture_region(self.selection_rect)
                 if frame:
                     frame_array = np.array(frame)
+                    if self.frame_listener:
+                        self.frame_listener(frame_array)
                     
                     # Use queue to prevent memory issues
                     try:
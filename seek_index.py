@@ -0,0 +1,148 @@
+import os
+import struct
+import numpy as np
+from typing import Optional, Tuple
+from utils.media_utils import run_ffprobe
+
+# One entry per video packet, in presentation order
+INDEX_DTYPE = np.dtype([("pts", "<f8"), ("offset", "<i8"), ("keyframe", "u1")])
+
+# Sidecar header: magic, version, entry count, source size, source mtime (ns)
+INDEX_MAGIC = b"SRIX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sIQQQ")
+
+def seek_index_path(video_path: str) -> str:
+    """Get the sidecar path that stores the seek index for a video."""
+    return os.path.splitext(video_path)[0] + ".seekindex"
+
+class SeekIndex:
+    def __init__(self, entries: np.ndarray):
+        """Initialize a seek index.
+
+        Args:
+            entries: Structured array of INDEX_DTYPE sorted by pts
+        """
+        self.entries = entries
+        self._keyframe_positions = np.flatnonzero(entries["keyframe"])
+        self._keyframes = entries["pts"][self._keyframe_positions]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, video_path: str) -> "SeekIndex":
+        """Index a video by reading its packet headers (no frames are decoded)."""
+        output = run_ffprobe([
+            "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,dts_time,pos,flags",
+            "-of", "csv=p=0",
+            video_path
+        ])
+        rows = []
+        for line in output.splitlines():
+            fields = line.split(",")
+            if len(fields) < 4:
+                continue
+            pts_time, dts_time, pos, flags = fields[:4]
+            time = pts_time if pts_time not in ("", "N/A") else dts_time
+            if time in ("", "N/A"):
+                continue
+            rows.append((float(time), int(pos) if pos not in ("", "N/A") else -1, "K" in flags))
+        entries = np.array(rows, dtype=INDEX_DTYPE)
+        entries.sort(order="pts", kind="stable")
+        return cls(entries)
+
+    @classmethod
+    def for_video(cls, video_path: str, write: bool = True) -> "SeekIndex":
+        """Get the index of a video, building and caching it on first use.
+
+        The sidecar is reused while the video's size and modification time
+        match those recorded in its header.
+
+        Args:
+            video_path: Video file to index
+            write: Save a newly built index as a sidecar
+        """
+        path = seek_index_path(video_path)
+        stat = os.stat(video_path)
+        index = cls.load(path, source_stat=(stat.st_size, stat.st_mtime_ns))
+        if index is None:
+            index = cls.build(video_path)
+            if write:
+                try:
+                    index.save(path, video_path)
+                except OSError as e:
+                    print(f"Could not write seek index: {e}")
+        return index
+
+    @classmethod
+    def load(cls, path: str, source_stat: Optional[Tuple[int, int]] = None) -> Optional["SeekIndex"]:
+        """Load a sidecar index.
+
+        Args:
+            path: Sidecar path
+            source_stat: Optional (size, mtime_ns) the index must have been built from
+
+        Returns:
+            The index, or None if it is missing, corrupt or stale
+        """
+        try:
+            with open(path, "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+                if len(header) < INDEX_HEADER.size:
+                    return None
+                magic, version, count, size, mtime = INDEX_HEADER.unpack(header)
+                if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                    return None
+                if source_stat is not None and (size, mtime) != tuple(source_stat):
+                    return None
+                entries = np.fromfile(f, dtype=INDEX_DTYPE, count=count)
+        except OSError:
+            return None
+        if len(entries) != count:
+            return None
+        return cls(entries)
+
+    def save(self, path: str, video_path: str):
+        """Write the index as a binary sidecar tied to the video's size and mtime."""
+        stat = os.stat(video_path)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self.entries),
+                                      stat.st_size, stat.st_mtime_ns))
+            self.entries.tofile(f)
+        os.replace(temp_path, path)
+
+    def keyframe_times(self) -> np.ndarray:
+        """Get the sorted presentation times of all keyframes."""
+        return self._keyframes
+
+    def keyframe_before(self, time: float) -> Optional[float]:
+        """Get the last keyframe at or before a time (where decoding must start)."""
+        index = np.searchsorted(self._keyframes, time, side="right") - 1
+        return float(self._keyframes[index]) if index >= 0 else None
+
+    def keyframe_after(self, time: float) -> Optional[float]:
+        """Get the first keyframe at or after a time."""
+        index = np.searchsorted(self._keyframes, time, side="left")
+        return float(self._keyframes[index]) if index < len(self._keyframes) else None
+
+    def frame_index(self, time: float) -> int:
+        """Get the position of the frame shown at a time (-1 before the first frame)."""
+        return int(np.searchsorted(self.entries["pts"], time, side="right")) - 1
+
+    def keyframe_index(self, index: int) -> int:
+        """Get the position of the keyframe decoding of a frame must start from."""
+        positions = self._keyframe_positions
+        found = np.searchsorted(positions, index, side="right") - 1
+        return int(positions[found]) if found >= 0 else 0
+
+    def frame_at(self, time: float) -> Optional[np.void]:
+        """Get the entry of the frame shown at a time."""
+        index = self.frame_index(time)
+        return self.entries[index] if index >= 0 else None
+
+def load_keyframes(video_path: str) -> list:
+    """Get the sorted keyframe times of a video from its (cached) seek index."""
+    return SeekIndex.for_video(video_path).keyframe_times().tolist()
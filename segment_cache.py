@@ -0,0 +1,146 @@
+import hashlib
+import os
+import shutil
+import threading
+import weakref
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# Disk space kept for encoded segments before the least recently used are removed
+DEFAULT_SEGMENT_CACHE_BYTES = 2 * 1024 ** 3
+
+# Length of the independently encoded segments of an incremental export
+EXPORT_SEGMENT_SECONDS = 4.0
+
+# Bump when the segment encoding changes so old entries are not reused
+SEGMENT_CACHE_VERSION = 1
+
+class SegmentCache:
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_SEGMENT_CACHE_BYTES):
+        """Initialize a cache of encoded video segments.
+
+        Segments are MPEG-TS files that start with a keyframe (closed GOPs),
+        stored under a hash of everything that determines their content,
+        so an export can stream-copy any segment whose inputs are unchanged.
+
+        Args:
+            directory: Directory holding the segment files
+            max_bytes: Disk space kept by prune()
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Reentrant: a freed frame's callback may run while the lock is held
+        self._lock = threading.RLock()
+        # Digests of frames still in memory, so re-exports do not hash them again
+        self._frame_digests: Dict[int, Tuple[weakref.ref, bytes]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def frame_digest(self, frame: np.ndarray) -> bytes:
+        """Get the content hash of a frame, computed once per frame object."""
+        key = id(frame)
+        with self._lock:
+            entry = self._frame_digests.get(key)
+            if entry is not None and entry[0]() is frame:
+                return entry[1]
+        digest = hashlib.blake2b(np.ascontiguousarray(frame).data, digest_size=16)
+        digest.update(repr((frame.shape, frame.dtype.str)).encode())
+        digest = digest.digest()
+        try:
+            ref = weakref.ref(frame, lambda _, key=key: self._forget(key))
+        except TypeError:
+            return digest
+        with self._lock:
+            self._frame_digests[key] = (ref, digest)
+        return digest
+
+    def get(self, key: str, destination: str) -> Optional[str]:
+        """Link a cached segment to destination and mark it recently used.
+
+        The caller reads its own link, so a prune by another export (or
+        process) cannot remove the segment while it is in use.
+
+        Args:
+            key: Segment key
+            destination: Path to link (or copy) the segment to
+
+        Returns:
+            destination, or None if the segment is not cached
+        """
+        path = self._path(key)
+        try:
+            os.utime(path)
+            _link_or_copy(path, destination)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return destination
+
+    def put(self, key: str, segment_path: str) -> str:
+        """Add an encoded segment to the cache, leaving segment_path in place.
+
+        Returns:
+            Path of the cached segment
+        """
+        path = self._path(key)
+        # Link or copy next to the entry first, so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            _link_or_copy(segment_path, temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return path
+
+    def prune(self, keep: tuple = ()):
+        """Remove the least recently used segments beyond max_bytes.
+
+        Args:
+            keep: Keys of segments that must not be removed (e.g. those just used)
+        """
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                # Segments being added are not entries yet
+                if not name.endswith(".ts"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            keep = {self._path(key) for key in keep}
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path in keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.ts")
+
+    def _forget(self, key: int):
+        """Drop the digest of a frame that was freed."""
+        with self._lock:
+            self._frame_digests.pop(key, None)
+
+def _link_or_copy(source: str, destination: str):
+    """Hard-link a file, copying it where links are not possible (e.g. across filesystems)."""
+    try:
+        os.link(source, destination)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(source, destination)
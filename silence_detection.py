@@ -0,0 +1,139 @@
+import numpy as np
+from typing import List, Tuple
+
+class SilenceDetector:
+    def __init__(self, sample_rate: int, threshold_db: float = -45.0,
+                 frame_seconds: float = 0.02, use_vad: bool = False):
+        """Initialize a streaming short-time energy detector.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            threshold_db: Energy (dBFS) below which a frame counts as silent
+            frame_seconds: Analysis frame length in seconds
+            use_vad: Additionally require speech-like spectra for a frame to
+                count as active, so steady background noise is trimmed too
+        """
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.use_vad = use_vad
+        self.frame_length = max(1, int(round(frame_seconds * sample_rate)))
+        self.frame_rate = sample_rate / self.frame_length
+        self._remainder = np.zeros(0)
+        self._activity = []
+
+        # Speech band used by the voice activity check
+        freqs = np.fft.rfftfreq(self.frame_length, 1.0 / sample_rate)
+        self._speech_band = (freqs >= 300) & (freqs <= 3400)
+        self._window = np.hanning(self.frame_length)
+
+    def process(self, block: np.ndarray):
+        """Analyze one block of captured audio."""
+        x = np.asarray(block)
+        if x.dtype.kind in 'iu':
+            x = x / float(np.iinfo(x.dtype).max + 1)
+        mono = x.reshape(len(x), -1).mean(axis=1)
+
+        samples = np.concatenate([self._remainder, mono])
+        count = len(samples) // self.frame_length
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+        self._remainder = samples[count * self.frame_length:]
+        if not count:
+            return
+
+        energy_db = 10.0 * np.log10(np.mean(np.square(frames), axis=1) + 1e-12)
+        active = energy_db > self.threshold_db
+        if self.use_vad:
+            active &= self._voice_like(frames)
+        self._activity.append(active)
+
+    def _voice_like(self, frames: np.ndarray) -> np.ndarray:
+        """Flag frames whose energy is concentrated in the speech band."""
+        spectrum = np.square(np.abs(np.fft.rfft(frames * self._window, axis=1)))
+        total = spectrum.sum(axis=1) + 1e-12
+        return spectrum[:, self._speech_band].sum(axis=1) / total > 0.5
+
+    def activity(self) -> np.ndarray:
+        """Get the per-frame activity flags analyzed so far."""
+        if not self._activity:
+            return np.zeros(0, dtype=bool)
+        return np.concatenate(self._activity)
+
+class StaticFrameDetector:
+    def __init__(self, threshold: float = 1.0, step: int = 8):
+        """Initialize a detector for video frames that do not change.
+
+        Args:
+            threshold: Mean absolute pixel difference below which a frame is static
+            step: Pixel stride used to subsample frames before comparing
+        """
+        self.threshold = threshold
+        self.step = step
+        self._previous = None
+        self._activity = []
+
+    def process(self, frame: np.ndarray) -> bool:
+        """Compare a frame with the previous one.
+
+        Returns:
+            True if the frame differs from the previous one
+        """
+        small = frame[::self.step, ::self.step].astype(np.int16)
+        changed = (
+            self._previous is None
+            or small.shape != self._previous.shape
+            or np.mean(np.abs(small - self._previous)) >= self.threshold
+        )
+        self._previous = small
+        self._activity.append(changed)
+        return changed
+
+    def activity(self) -> np.ndarray:
+        """Get the per-frame activity flags analyzed so far."""
+        return np.asarray(self._activity, dtype=bool)
+
+def find_removable_ranges(audio_activity: np.ndarray, audio_rate: float,
+                          video_activity: np.ndarray, fps: float,
+                          min_duration: float = 2.0, padding: float = 0.25) -> List[Tuple[float, float]]:
+    """Find stretches that are both silent and visually static.
+
+    Args:
+        audio_activity: Per-frame audio activity flags
+        audio_rate: Audio analysis frames per second
+        video_activity: Per-frame video activity flags
+        fps: Video frames per second
+        min_duration: Shortest stretch worth removing, in seconds
+        padding: Time kept on each side of a removed stretch, in seconds
+
+    Returns:
+        List of (start, end) ranges in seconds
+    """
+    # Work at the finer audio resolution when audio was analyzed
+    rate = audio_rate if len(audio_activity) else fps
+    duration = max(len(audio_activity) / audio_rate if len(audio_activity) else 0.0,
+                   len(video_activity) / fps if len(video_activity) else 0.0)
+    steps = int(np.ceil(duration * rate))
+    if steps == 0:
+        return []
+
+    # Resample both signals onto a common grid; missing data counts as active
+    times = np.arange(steps) / rate
+    active = np.ones(steps, dtype=bool)
+    if len(audio_activity):
+        index = (times * audio_rate).astype(int)
+        active = np.where(index < len(audio_activity),
+                          audio_activity[np.minimum(index, len(audio_activity) - 1)], True)
+    if len(video_activity):
+        index = (times * fps).astype(int)
+        active |= np.where(index < len(video_activity),
+                           video_activity[np.minimum(index, len(video_activity) - 1)], True)
+
+    # Locate runs of inactivity
+    edges = np.diff(np.concatenate([[1], active.astype(np.int8), [1]]))
+    starts = np.flatnonzero(edges == -1)
+    ends = np.flatnonzero(edges == 1)
+
+    ranges = []
+    for start, end in zip(starts / rate, ends / rate):
+        if end - start >= min_duration:
+            ranges.append((float(start + padding), float(end - padding)))
+    return ranges
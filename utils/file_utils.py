@@ -1,19 +1,45 @@
 import os
+import sys
 from pathlib import Path
 
+# Folder of the application inside the per-user cache directory
+CACHE_APP_NAME = "PC Screen Recorder"
+
 def get_default_save_directory():
     """Get the default directory for saving recordings."""
     videos_dir = str(Path.home() / "Videos" / "Screen Recordings")
     os.makedirs(videos_dir, exist_ok=True)
     return videos_dir
 
-def generate_filename(prefix="recording", extension="mp4"):
-    """Generate a unique filename for the recording."""
+def get_cache_directory(name):
+    """Get a per-user cache directory of the application that persists across sessions.
+    
+    Args:
+        name: Subdirectory for one kind of cached data
+    """
+    if sys.platform == "win32":
+        base_dir = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base_dir = str(Path.home() / "Library" / "Caches")
+    else:
+        base_dir = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    cache_dir = os.path.join(base_dir, CACHE_APP_NAME, name)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def generate_filename(prefix="recording", extension="mp4", exclude=()):
+    """Generate a unique filename for the recording.
+    
+    Args:
+        prefix: File name prefix
+        extension: File extension without the dot
+        exclude: Paths that are taken although they do not exist yet
+    """
     base_dir = get_default_save_directory()
     counter = 1
     while True:
         filename = f"{prefix}_{counter}.{extension}"
         filepath = os.path.join(base_dir, filename)
-        if not os.path.exists(filepath):
+        if not os.path.exists(filepath) and filepath not in exclude:
             return filepath
         counter += 1
@@ -0,0 +1,235 @@
+import subprocess
+import bisect
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# Niceness added to background ffmpeg processes on POSIX systems
+LOW_PRIORITY_NICENESS = 10
+
+def run_ffprobe(args: List[str]) -> str:
+    """Run ffprobe quietly and return its standard output."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", *args],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()}")
+    return result.stdout
+
+def run_ffmpeg(args: List[str], low_priority: bool = False, duration: Optional[float] = None,
+               progress_callback: Optional[Callable[[float], None]] = None):
+    """Run ffmpeg quietly, raising RuntimeError with its error output on failure.
+
+    With a progress callback, ffmpeg reports its output time on a pipe and
+    the callback is called with the finished fraction of duration. If the
+    callback raises, ffmpeg is killed and the exception is re-raised.
+
+    Args:
+        args: ffmpeg arguments after the global options
+        low_priority: Run below normal CPU priority so foreground work is not slowed
+        duration: Output duration in seconds, required with progress_callback
+        progress_callback: Optional function called with the finished fraction
+    """
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y", *args]
+    if progress_callback:
+        if not duration:
+            raise ValueError("A duration is required to report progress")
+        command[1:1] = ["-progress", "pipe:1", "-nostats"]
+    options = {}
+    if low_priority:
+        if os.name == "nt":
+            options["creationflags"] = subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        elif shutil.which("nice"):
+            # preexec_fn is not safe in threaded programs, so nice(1) lowers it instead
+            command = ["nice", "-n", str(LOW_PRIORITY_NICENESS), *command]
+    if not progress_callback:
+        result = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            **options
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+        return
+
+    # Errors go to a file so a full stderr pipe cannot stall the progress reads
+    with tempfile.TemporaryFile(mode="w+") as errors:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors,
+                                   text=True, **options)
+        try:
+            for line in process.stdout:
+                key, _, value = line.strip().partition("=")
+                if key == "out_time_us" and value.isdigit():
+                    progress_callback(min(1.0, int(value) / 1e6 / duration))
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            process.stdout.close()
+            process.wait()
+        if process.returncode != 0:
+            errors.seek(0)
+            raise RuntimeError(f"ffmpeg failed: {errors.read().strip()}")
+
+def decode_frames(path: str, start: float = 0.0, duration: Optional[float] = None,
+                  size: Optional[Tuple[int, int]] = None, frame_size: Optional[Tuple[int, int]] = None,
+                  fps: Optional[float] = None, extra_args: Optional[List[str]] = None) -> Iterator[np.ndarray]:
+    """Decode RGB frames from a video through an ffmpeg pipe.
+
+    Args:
+        path: Video file to decode
+        start: Start time in seconds (frame-accurate)
+        duration: Optional duration in seconds
+        size: Optional (width, height) to scale and letterbox frames to
+        frame_size: (width, height) of the decoded frames when size is not given
+        fps: Optional frame rate to convert to
+        extra_args: Optional extra input options (e.g. ["-skip_frame", "nokey"])
+
+    Yields:
+        RGB frames of shape (height, width, 3)
+    """
+    if size is None and frame_size is None:
+        raise ValueError("Either size or frame_size is required")
+    width, height = size or frame_size
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin",
+               *(extra_args or []), "-ss", f"{start:.6f}", "-i", path]
+    if duration is not None:
+        command += ["-t", f"{duration:.6f}"]
+    filters = []
+    if size is not None:
+        filters.append(f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                       f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2")
+    if fps is not None:
+        filters.append(f"fps={fps}")
+    if filters:
+        command += ["-vf", ",".join(filters)]
+    command += ["-an", "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:"]
+
+    frame_bytes = width * height * 3
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+def probe_duration(path: str) -> float:
+    """Get the container duration of a media file in seconds."""
+    output = run_ffprobe(["-show_entries", "format=duration", "-of", "csv=p=0", path])
+    return float(output.strip())
+
+def probe_frame_rate(path: str) -> float:
+    """Get the frame rate of the first video stream."""
+    output = run_ffprobe([
+        "-select_streams", "v:0",
+        "-show_entries", "stream=avg_frame_rate,r_frame_rate",
+        "-of", "csv=p=0",
+        path
+    ])
+    for rate in output.strip().split(","):
+        numerator, _, denominator = rate.partition("/")
+        if float(numerator or 0) > 0 and float(denominator or 1) > 0:
+            return float(numerator) / float(denominator or 1)
+    raise RuntimeError(f"Could not determine frame rate of {path}")
+
+def probe_stream_params(path: str) -> dict:
+    """Get the codec parameters that must match for stream-copy concatenation.
+
+    Returns:
+        Dict with "video" and "audio" entries, each a dict of parameters or None
+    """
+    output = run_ffprobe([
+        "-show_entries",
+        "stream=codec_type,codec_name,profile,width,height,pix_fmt,r_frame_rate,sample_rate,channels",
+        "-of", "json",
+        path
+    ])
+    params = {"video": None, "audio": None}
+    for stream in json.loads(output).get("streams", []):
+        kind = stream.get("codec_type")
+        if kind == "video" and params["video"] is None:
+            params["video"] = {key: stream.get(key) for key in
+                               ("codec_name", "profile", "width", "height", "pix_fmt", "r_frame_rate")}
+        elif kind == "audio" and params["audio"] is None:
+            params["audio"] = {key: stream.get(key) for key in
+                               ("codec_name", "profile", "sample_rate", "channels")}
+    return params
+
+def probe_keyframes(path: str) -> List[float]:
+    """Get the sorted presentation times of all video keyframes.
+
+    Only packet headers are read, so no frames are decoded.
+    """
+    output = run_ffprobe([
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        path
+    ])
+    keyframes = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    return sorted(keyframes)
+
+def keyframe_span(keyframes: List[float], start: float, end: float) -> Optional[tuple]:
+    """Get the first and last keyframes inside [start, end].
+
+    Returns:
+        (first, last) keyframe times, or None when fewer than two keyframes
+        fall inside the range
+    """
+    lo = bisect.bisect_left(keyframes, start)
+    hi = bisect.bisect_right(keyframes, end) - 1
+    if lo >= hi:
+        return None
+    return keyframes[lo], keyframes[hi]
+
+def snap_to_keyframe(keyframes: List[float], time: float) -> float:
+    """Get the keyframe closest to the given time."""
+    index = bisect.bisect_left(keyframes, time)
+    candidates = keyframes[max(0, index - 1):index + 1]
+    return min(candidates, key=lambda keyframe: abs(keyframe - time)) if candidates else time
+
+def invert_ranges(ranges: List[tuple], duration: float) -> List[tuple]:
+    """Get the parts of [0, duration] not covered by the given ranges."""
+    kept = []
+    position = 0.0
+    for start, end in sorted(ranges):
+        start, end = max(0.0, start), min(duration, end)
+        if start > position:
+            kept.append((position, start))
+        position = max(position, end)
+    if position < duration:
+        kept.append((position, duration))
+    return kept
+
+def group_keyframes(keyframes: List[float], duration: float, chunk_seconds: float) -> List[tuple]:
+    """Split [0, duration] at keyframes into chunks of at least chunk_seconds.
+
+    Chunk boundaries depend only on the keyframes and the target length, so
+    the same file is always split the same way.
+
+    Returns:
+        List of (start, end) ranges covering the whole duration
+    """
+    chunks = []
+    start = 0.0
+    for keyframe in keyframes:
+        if keyframe - start >= chunk_seconds and duration - keyframe > 1e-3:
+            chunks.append((start, keyframe))
+            start = keyframe
+    chunks.append((start, duration))
+    return chunks
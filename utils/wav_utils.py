@@ -0,0 +1,92 @@
+import struct
+import numpy as np
+
+# Capture formats: numpy dtype used for buffering and bytes per sample on disk.
+# 24-bit audio is captured left-justified in int32 and packed when written.
+SAMPLE_FORMATS = {
+    "int16": {"dtype": np.int16, "width": 2},
+    "int24": {"dtype": np.int32, "width": 3},
+    "float32": {"dtype": np.float32, "width": 4},
+}
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+
+# Frames converted at a time, to bound temporary memory
+CHUNK_FRAMES = 65536
+
+def convert_samples(data: np.ndarray, dtype, chunk_frames: int = CHUNK_FRAMES) -> np.ndarray:
+    """Convert samples between float and integer formats with clipping.
+
+    Floats are in [-1.0, 1.0]; integers use their full range. The conversion
+    runs in chunks so no full-size float64 temporary is created.
+
+    Args:
+        data: Samples of shape (frames, channels)
+        dtype: Target numpy dtype
+        chunk_frames: Frames converted per chunk
+
+    Returns:
+        Converted samples
+    """
+    src = np.dtype(data.dtype)
+    dst = np.dtype(dtype)
+    if src == dst:
+        return data
+
+    # float32 cannot represent the int32 range exactly
+    work = np.float64 if max(src.itemsize, dst.itemsize) >= 4 and 'i' in (src.kind, dst.kind) else np.float32
+    out = np.empty(data.shape, dtype=dst)
+    for start in range(0, len(data), chunk_frames):
+        chunk = data[start:start + chunk_frames].astype(work)
+        if src.kind in 'iu':
+            chunk *= 1.0 / (np.iinfo(src).max + 1)
+        if dst.kind in 'iu':
+            info = np.iinfo(dst)
+            chunk *= info.max + 1
+            np.clip(chunk, info.min, info.max, out=chunk)
+            np.rint(chunk, out=chunk)
+        out[start:start + chunk_frames] = chunk
+    return out
+
+def _pack_int24(chunk: np.ndarray) -> bytes:
+    """Pack left-justified int32 samples into little-endian 24-bit bytes."""
+    raw = np.ascontiguousarray(chunk, dtype='<i4').view(np.uint8).reshape(-1, 4)
+    return raw[:, 1:].tobytes()
+
+def write_wav(path: str, data: np.ndarray, sample_rate: int, sample_format: str = "int16",
+              chunk_frames: int = CHUNK_FRAMES):
+    """Write samples to a WAV file in the given sample format.
+
+    Args:
+        path: Output file path
+        data: Samples of shape (frames, channels) or (frames,)
+        sample_rate: Sample rate in Hz
+        sample_format: One of SAMPLE_FORMATS
+        chunk_frames: Frames written per chunk
+    """
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(f"Unsupported sample format: {sample_format}")
+
+    data = data.reshape(len(data), -1)
+    channels = data.shape[1]
+    width = SAMPLE_FORMATS[sample_format]["width"]
+    data = convert_samples(data, SAMPLE_FORMATS[sample_format]["dtype"], chunk_frames)
+    data_size = len(data) * channels * width
+    format_tag = WAVE_FORMAT_IEEE_FLOAT if sample_format == "float32" else WAVE_FORMAT_PCM
+
+    with open(path, 'wb') as f:
+        f.write(b'RIFF')
+        f.write(struct.pack('<I', 36 + data_size))
+        f.write(b'WAVE')
+        f.write(b'fmt ')
+        f.write(struct.pack('<IHHIIHH', 16, format_tag, channels, sample_rate,
+                            sample_rate * channels * width, channels * width, width * 8))
+        f.write(b'data')
+        f.write(struct.pack('<I', data_size))
+        for start in range(0, len(data), chunk_frames):
+            chunk = data[start:start + chunk_frames]
+            if sample_format == "int24":
+                f.write(_pack_int24(chunk))
+            else:
+                f.write(np.ascontiguousarray(chunk).astype(chunk.dtype.newbyteorder('<')).tobytes())
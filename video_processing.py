@@ -1,65 +1,167 @@
 import cv2
+import ffmpeg
 import numpy as np
-from moviepy.editor import VideoFileClip, AudioFileClip, ImageSequenceClip
 from pathlib import Path
+import hashlib
+import itertools
+import math
+import json
 import tempfile
 import os
+import shutil
+import threading
+from collections import Counter
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from annotations import AnnotationManager
-from typing import List, Optional
+from edit_list import EditDecisionList, PlannedSpan
+from seek_index import load_keyframes
+from frame_server import FrameServer
+from segment_cache import EXPORT_SEGMENT_SECONDS, SEGMENT_CACHE_VERSION, SegmentCache
+from proxy import PROXY_PROFILE, PROXY_WIDTH, find_proxy, proxy_sidecar_path, proxy_size
+from loudness import read_loudness_sidecar, loudness_sidecar_path
+from utils.resolution_utils import RESOLUTIONS
+from encoders import get_encoder_backend, get_encoding_profile, FFmpegPipeEncoder
+from utils.media_utils import (run_ffmpeg, decode_frames, probe_duration, probe_frame_rate,
+                               probe_stream_params, keyframe_span, snap_to_keyframe, invert_ranges,
+                               group_keyframes)
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+# Audio files that are already compressed and can be muxed by stream copy
+COMPRESSED_AUDIO_EXTENSIONS = ('.m4a', '.aac', '.opus', '.ogg')
+
+# Encoders that reproduce the streams of a source, by codec name
+CONFORM_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265', 'mpeg4': 'mpeg4', 'aac': 'aac', 'opus': 'libopus'}
+
+# Bitstream filters that turn MP4-style video packets into MPEG-TS ones, by codec name
+ANNEXB_FILTERS = {'h264': 'h264_mp4toannexb', 'hevc': 'hevc_mp4toannexb'}
+
+# Encoder profile names of the ffprobe video profiles that can be reproduced
+ENCODER_PROFILES = {
+    'Constrained Baseline': 'baseline', 'Baseline': 'baseline', 'Main': 'main', 'High': 'high',
+    'High 10': 'high10', 'High 4:2:2': 'high422', 'High 4:4:4 Predictive': 'high444',
+    'Main 10': 'main10',
+}
+
+# Containers that exports can be remuxed into. Audio codecs a container
+# cannot hold are re-encoded with its fallback encoder; video is always copied.
+CONTAINER_FORMATS = {
+    'mp4': {'extension': '.mp4', 'options': ['-movflags', '+faststart'],
+            'audio_codecs': ('aac', 'mp3', 'opus', 'alac'), 'audio_encoder': 'aac'},
+    'mov': {'extension': '.mov', 'options': ['-movflags', '+faststart'],
+            'audio_codecs': ('aac', 'mp3', 'alac', 'pcm_s16le'), 'audio_encoder': 'aac'},
+    'mkv': {'extension': '.mkv', 'options': [], 'audio_codecs': None, 'audio_encoder': None},
+    'avi': {'extension': '.avi', 'options': [],
+            'audio_codecs': ('mp3', 'ac3', 'pcm_s16le'), 'audio_encoder': 'libmp3lame'},
+}
+
+# Peak video bitrates of the rendition ladder, by resolution preset
+LADDER_MAX_BITRATES = {'1080p': '5000k', '720p': '2800k', '480p': '1400k'}
+
+# Timeline sprite sheet layout
+SPRITE_TILES = 100
+SPRITE_COLUMNS = 10
+SPRITE_TILE_WIDTH = 160
+
+# Poster frame position as a fraction of the duration, and its maximum width
+POSTER_POSITION = 0.1
+POSTER_MAX_WIDTH = 1280
+
+# Seconds read past the last copied GOP so the splitting keyframe is reached
+GOP_COPY_MARGIN = 0.5
+
+# Target length of the independently encoded chunks of a parallel export
+EXPORT_CHUNK_SECONDS = 10.0
+
+def _encode_chunk(source: str, start: float, frame_count: int, codec: str, threads: int,
+                  encoder_args: List[str], piece: str, low_priority: bool = False):
+    """Encode one chunk of a parallel export (runs in a worker process).
+    
+    The thread count is fixed per chunk because x264's output depends on
+    it; this keeps the result identical for any number of workers.
+    """
+    run_ffmpeg([
+        "-ss", f"{start:.6f}", "-i", source,
+        "-map", "0:v:0", "-frames:v", str(frame_count),
+        "-c:v", codec, "-pix_fmt", "yuv420p", "-threads", str(threads),
+        *encoder_args,
+        "-f", "mpegts", piece
+    ], low_priority=low_priority)
+    return piece
 
 class VideoProcessor:
-    def __init__(self, output_path=None, fps=30.0):
+    def __init__(self, output_path=None, fps=30.0, encoder_backend=None, profile=None):
         """Initialize video processor.
         
         Args:
             output_path: Path to save the video
             fps: Frames per second for the output video
+            encoder_backend: Encoder backend name ("ffmpeg", "pyav" or "opencv");
+                None picks the best available one
+            profile: Encoding profile name, one of ENCODING_PROFILES
+                ("capture-fast", "archive-small" or "share-balanced");
+                None uses the default
         """
         self.output_path = output_path
         self.fps = fps
+        self.encoder_backend = get_encoder_backend(encoder_backend)
+        self.profile = get_encoding_profile(profile)
         self.temp_dir = tempfile.mkdtemp()
         self.annotation_manager = AnnotationManager()
+        self.edit_list = None
         
-    def frames_to_video(self, frames: List[np.ndarray], audio_path: Optional[str] = None):
+    def frames_to_video(self, frames: Iterable[np.ndarray], audio_path: Optional[str] = None,
+                        segment_cache: Optional[SegmentCache] = None):
         """Convert frames to video file.
         
+        Frames are annotated and handed to the encoder one at a time, so any
+        iterator (e.g. a generator reading from a capture queue) can be used.
+        
+        With a segment cache, the video is encoded as independent segments
+        keyed by a hash of their frames, active annotations and encoding
+        settings; segments already in the cache are reused, so exporting
+        again after a small edit only encodes the segments it touched.
+        Segments are always written by the ffmpeg pipe encoder, whatever
+        the encoder backend; without ffmpeg the cache is not used.
+        
         Args:
-            frames: List of numpy arrays containing frame data
+            frames: Iterable of numpy arrays containing RGB frame data
             audio_path: Optional path to audio file to merge with video
+            segment_cache: Optional cache of encoded segments to reuse
         
         Returns:
             Path to the created video file
         """
-        if not frames:
+        frames = iter(frames)
+        first_frame = next(frames, None)
+        if first_frame is None:
             raise ValueError("No frames provided for video creation")
             
         try:
-            # Apply annotations to frames
-            annotated_frames = []
-            for frame in frames:
-                annotated_frame = self.annotation_manager.draw_annotations(frame.copy())
-                annotated_frames.append(annotated_frame)
-                
-            # Create video from frames
-            clip = ImageSequenceClip(annotated_frames, fps=self.fps)
+            # Apply annotations lazily as frames are encoded
+            annotated_frames = (
+                self.annotation_manager.draw_annotations(frame, index / self.fps)
+                for index, frame in enumerate(itertools.chain([first_frame], frames))
+            )
             
-            # Add audio if provided
-            if audio_path and os.path.exists(audio_path):
-                audio = AudioFileClip(audio_path)
-                clip = clip.set_audio(audio)
+            has_audio = bool(audio_path and os.path.exists(audio_path))
+            video_path = self.output_path
+            if has_audio:
+                video_path = os.path.join(self.temp_dir, f"video_only{Path(self.output_path).suffix}")
             
             # Save video with proper error handling
             try:
-                clip.write_videofile(
-                    self.output_path,
-                    codec='libx264',
-                    audio_codec='aac' if audio_path else None,
-                    temp_audiofile=os.path.join(self.temp_dir, "temp-audio.m4a"),
-                    remove_temp=True,
-                    threads=4
-                )
+                if segment_cache is not None and FFmpegPipeEncoder.is_available():
+                    self._encode_segments(itertools.chain([first_frame], frames), video_path, segment_cache)
+                else:
+                    encoder = self.encoder_backend(video_path, fps=self.fps, codec='libx264', profile=self.profile)
+                    encoder.encode(annotated_frames)
+                if has_audio:
+                    # Audio compressed during capture is muxed without re-encoding
+                    copy_audio = Path(audio_path).suffix.lower() in COMPRESSED_AUDIO_EXTENSIONS
+                    self._mux_audio(video_path, audio_path, self.output_path, copy_audio)
+                    os.remove(video_path)
             finally:
-                clip.close()
                 if audio_path and os.path.exists(audio_path):
                     try:
                         os.remove(audio_path)
@@ -71,34 +173,1049 @@ class VideoProcessor:
         except Exception as e:
             raise RuntimeError(f"Failed to create video: {str(e)}")
         
-    def trim_video(self, start_time: float, end_time: float):
+    def _encode_segments(self, frames: Iterable[np.ndarray], output_path: str, cache: SegmentCache):
+        """Encode frames as cached closed-GOP segments and join them.
+        
+        The pieces must be MPEG-TS files that start on a keyframe, which
+        only the ffmpeg pipe encoder writes, so self.encoder_backend is not
+        used here and is not part of the cache key.
+        
+        Args:
+            frames: RGB frames, not yet annotated
+            output_path: Path of the video-only file
+            cache: Segment cache to reuse and fill
+        """
+        frames_per_segment = max(1, round(EXPORT_SEGMENT_SECONDS * self.fps))
+        settings = repr((SEGMENT_CACHE_VERSION, self.fps, self.profile.name,
+                         self.profile.ffmpeg_args(self.fps))).encode()
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        try:
+            pieces = []
+            keys = []
+            start = 0
+            while True:
+                batch = list(itertools.islice(frames, frames_per_segment))
+                if not batch:
+                    break
+                times = [(start + index) / self.fps for index in range(len(batch))]
+                key = hashlib.blake2b(settings, digest_size=16)
+                for frame, at_time in zip(batch, times):
+                    key.update(cache.frame_digest(frame))
+                    # Only what is drawn matters, not when an annotation was created
+                    key.update(repr([
+                        (a.text, a.position, a.color, a.font_scale, a.thickness, a.font_face, a.background_color)
+                        for a in self.annotation_manager.annotations if a.is_active(at_time)
+                    ]).encode())
+                key = key.hexdigest()
+                
+                # Pieces are joined from work_dir, where a prune elsewhere cannot reach them
+                piece = os.path.join(work_dir, f"segment_{len(pieces):05d}.ts")
+                if cache.get(key, piece) is None:
+                    encoder = FFmpegPipeEncoder(piece, fps=self.fps, codec="libx264", profile=self.profile)
+                    encoder.encode(self.annotation_manager.draw_annotations(frame, at_time)
+                                   for frame, at_time in zip(batch, times))
+                    cache.put(key, piece)
+                pieces.append(piece)
+                keys.append(key)
+                start += len(batch)
+            
+            self._concat_pieces(pieces, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        cache.prune(keep=keys)
+        
+    def _mux_audio(self, video_path: str, audio_path: str, output_path: str, copy_audio: bool = True):
+        """Combine a video file and an audio file, copying the video stream.
+        
+        Args:
+            video_path: Path to the video-only file
+            audio_path: Path to the audio file
+            output_path: Path of the combined file
+            copy_audio: Copy the audio stream as is instead of encoding it to AAC
+        """
+        video = ffmpeg.input(video_path)
+        audio = ffmpeg.input(audio_path)
+        try:
+            ffmpeg.output(
+                video.video, audio.audio, output_path,
+                vcodec='copy', acodec='copy' if copy_audio else 'aac',
+                movflags='+faststart'
+            ).overwrite_output().run(quiet=True)
+        except ffmpeg.Error as e:
+            raise RuntimeError(f"Failed to mux audio: {e.stderr.decode(errors='replace')}")
+        
+    def trim_video(self, start_time: float, end_time: float,
+                   progress_callback: Optional[Callable[[float], None]] = None):
         """Trim video to specified time range.
         
+        The range is snapped to frame boundaries. Everything between the first
+        and last keyframe inside it is stream-copied and only the partial GOPs
+        at each end are re-encoded, so trimming costs about two GOPs of
+        encoding regardless of the recording length.
+        
         Args:
             start_time: Start time in seconds
             end_time: End time in seconds
+            progress_callback: Optional function called with the finished
+                fraction; an exception raised from it aborts the trim
         """
         if not self.output_path or not os.path.exists(self.output_path):
             raise ValueError("No video file to trim")
             
-        clip = VideoFileClip(self.output_path)
-        trimmed = clip.subclip(start_time, end_time)
+        duration = probe_duration(self.output_path)
+        fps = probe_frame_rate(self.output_path)
+        start_time = round(max(0.0, start_time) * fps) / fps
+        end_time = min(round(end_time * fps) / fps, duration)
+        if end_time <= start_time:
+            raise ValueError("Trim range is empty")
         
         # Create new filename for trimmed video
         path = Path(self.output_path)
         trimmed_path = str(path.parent / f"{path.stem}_trimmed{path.suffix}")
         
-        trimmed.write_videofile(trimmed_path, 
-                              codec='libx264',
-                              audio_codec='aac' if clip.audio else None)
-        
-        clip.close()
-        trimmed.close()
+        self._render_ranges(self.output_path, [(start_time, end_time)], trimmed_path, progress_callback)
         
         # Update output path to trimmed video
         self.output_path = trimmed_path
         return self.output_path
         
+    def normalize_loudness(self, target_lufs: float = -16.0, max_true_peak: float = -1.0,
+                           stats_path: Optional[str] = None):
+        """Normalize audio loudness in a single pass using the measured loudness sidecar.
+        
+        The gain is derived from the statistics recorded during capture, so no
+        analysis pass is needed; the video stream is copied unchanged.
+        
+        Args:
+            target_lufs: Target integrated loudness in LUFS
+            max_true_peak: Highest allowed true peak in dBTP after the gain
+            stats_path: Loudness sidecar path (defaults to the one next to the video)
+        
+        Returns:
+            Path to the normalized video file
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to normalize")
+            
+        stats = read_loudness_sidecar(stats_path or loudness_sidecar_path(self.output_path))
+        if stats.integrated_lufs is None:
+            raise ValueError("Recording is silent; nothing to normalize")
+            
+        gain = target_lufs - stats.integrated_lufs
+        if stats.true_peak_dbtp is not None:
+            gain = min(gain, max_true_peak - stats.true_peak_dbtp)
+        
+        path = Path(self.output_path)
+        normalized_path = str(path.parent / f"{path.stem}_normalized{path.suffix}")
+        
+        source = ffmpeg.input(self.output_path)
+        try:
+            ffmpeg.output(
+                source.video,
+                source.audio.filter('volume', f"{gain:.2f}dB"),
+                normalized_path,
+                vcodec='copy',
+                acodec='aac'
+            ).overwrite_output().run(quiet=True)
+        except ffmpeg.Error as e:
+            raise RuntimeError(f"Failed to normalize loudness: {e.stderr.decode(errors='replace')}")
+        
+        self.output_path = normalized_path
+        return self.output_path
+        
+    def remove_ranges(self, ranges: List[Tuple[float, float]]):
+        """Remove time ranges from the video, e.g. detected dead air.
+        
+        Content between keyframes is stream-copied; only the partial GOPs at
+        each cut boundary are re-encoded.
+        
+        Args:
+            ranges: List of (start, end) ranges in seconds to drop
+        
+        Returns:
+            Path to the shortened video file
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to cut")
+            
+        keep = invert_ranges(ranges, probe_duration(self.output_path))
+        if not keep:
+            raise ValueError("Nothing left after removing ranges")
+            
+        path = Path(self.output_path)
+        cut_path = str(path.parent / f"{path.stem}_cut{path.suffix}")
+        self._render_ranges(self.output_path, keep, cut_path)
+        
+        self.output_path = cut_path
+        return self.output_path
+        
+    def cut_video(self, ranges: List[Tuple[float, float]], lossless: bool = True):
+        """Cut time ranges out of the video.
+        
+        Args:
+            ranges: List of (start, end) ranges in seconds to remove
+            lossless: Snap the cut points to the nearest keyframes so the
+                result is pure stream copy; otherwise cut frame-accurately,
+                re-encoding the partial GOPs at each cut
+        
+        Returns:
+            Path to the cut video file
+        """
+        if not lossless:
+            return self.remove_ranges(ranges)
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to cut")
+            
+        duration = probe_duration(self.output_path)
+        keyframes = load_keyframes(self.output_path)
+        keep = []
+        for start, end in invert_ranges(ranges, duration):
+            start = snap_to_keyframe(keyframes, start)
+            end = snap_to_keyframe(keyframes, end) if end < duration else duration
+            if end > start:
+                keep.append((start, end))
+        if not keep:
+            raise ValueError("Nothing left after cutting ranges")
+            
+        params = probe_stream_params(self.output_path)
+        path = Path(self.output_path)
+        cut_path = str(path.parent / f"{path.stem}_cut{path.suffix}")
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        try:
+            pieces = []
+            for start, end in keep:
+                piece = os.path.join(work_dir, f"piece_{len(pieces):05d}.ts")
+                self._copy_gops(self.output_path, start, end, piece, params)
+                pieces.append(piece)
+            self._concat_pieces(pieces, cut_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        self.output_path = cut_path
+        return self.output_path
+        
+    def merge_videos(self, paths: List[str], output_path: Optional[str] = None,
+                     progress_callback: Optional[Callable[[float], None]] = None):
+        """Merge recordings end to end.
+        
+        Inputs whose codec parameters match the most common parameter set are
+        stream-copied; only mismatched inputs are re-encoded to that common
+        profile, so merging matching recordings costs I/O, not encoding.
+        
+        Args:
+            paths: Video files in playback order
+            output_path: Path of the merged file (defaults to <first>_merged)
+            progress_callback: Optional function called with the finished
+                fraction; an exception raised from it aborts the merge
+        
+        Returns:
+            Path to the merged video file
+        """
+        if not paths:
+            raise ValueError("No videos to merge")
+        missing = [p for p in paths if not os.path.exists(p)]
+        if missing:
+            raise ValueError(f"Videos not found: {', '.join(missing)}")
+            
+        params = [probe_stream_params(p) for p in paths]
+        keys = [json.dumps(p, sort_keys=True) for p in params]
+        reference_key = Counter(keys).most_common(1)[0][0]
+        reference = params[keys.index(reference_key)]
+        if reference["video"] is None:
+            raise ValueError("Videos to merge have no video stream")
+            
+        if output_path is None:
+            path = Path(paths[0])
+            output_path = str(path.parent / f"{path.stem}_merged{path.suffix}")
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        try:
+            pieces = []
+            for path, key in zip(paths, keys):
+                piece = os.path.join(work_dir, f"merge_{len(pieces):05d}.ts")
+                if key == reference_key:
+                    run_ffmpeg([
+                        "-i", path, "-c", "copy",
+                        *self._annexb_args(reference["video"]["codec_name"]),
+                        "-f", "mpegts", piece
+                    ])
+                else:
+                    self._conform_piece(path, reference, piece)
+                pieces.append(piece)
+                if progress_callback:
+                    progress_callback(len(pieces) / len(paths))
+            self._concat_pieces(pieces, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            
+        self.output_path = output_path
+        return self.output_path
+        
+    def export_formats(self, formats: List[str], base_path: Optional[str] = None) -> dict:
+        """Write the video into several containers without re-encoding it.
+        
+        All containers are written by one ffmpeg process that reads the
+        source once and stream-copies the video into each output, so extra
+        formats cost I/O rather than encoding time. Audio is copied too,
+        unless the container cannot hold its codec (e.g. AAC in AVI).
+        
+        Args:
+            formats: Container names, any of CONTAINER_FORMATS ("mp4", "mov", "mkv", "avi")
+            base_path: Output path without extension (defaults to the source's)
+        
+        Returns:
+            Dict mapping each format to its file path
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to export")
+        unknown = [f for f in formats if f not in CONTAINER_FORMATS]
+        if unknown:
+            raise ValueError(f"Unsupported export formats: {', '.join(unknown)}")
+            
+        source = self.output_path
+        base_path = base_path or str(Path(source).with_suffix(''))
+        audio = probe_stream_params(source)["audio"]
+        
+        paths = {}
+        args = ["-i", source]
+        for name in dict.fromkeys(formats):
+            container = CONTAINER_FORMATS[name]
+            path = base_path + container['extension']
+            paths[name] = path
+            if os.path.abspath(path) == os.path.abspath(source):
+                continue
+            audio_codecs = container['audio_codecs']
+            copy_audio = audio is None or audio_codecs is None or audio["codec_name"] in audio_codecs
+            args += [
+                "-map", "0:v:0", "-map", "0:a:0?",
+                "-c:v", "copy",
+                "-c:a", "copy" if copy_audio else container['audio_encoder'],
+                *container['options'],
+                path
+            ]
+        if len(args) > 2:
+            run_ffmpeg(args)
+        return paths
+        
+    def export_ladder(self, presets: Optional[List[str]] = None, base_path: Optional[str] = None) -> dict:
+        """Render adaptive-bitrate renditions from a single decode.
+        
+        One ffmpeg process decodes the source once, splits the frames to a
+        scaler and encoder per preset and writes all renditions at once.
+        Keyframes are forced at the same timestamps in every rendition so
+        players can switch between them at any GOP boundary. Presets larger
+        than the source are skipped.
+        
+        Args:
+            presets: Names from RESOLUTIONS (defaults to all of them)
+            base_path: Output path without extension (defaults to the source's)
+        
+        Returns:
+            Dict mapping each rendered preset to its file path
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to export")
+        presets = presets or list(RESOLUTIONS)
+        unknown = [p for p in presets if p not in RESOLUTIONS]
+        if unknown:
+            raise ValueError(f"Unknown resolution presets: {', '.join(unknown)}")
+            
+        source = self.output_path
+        video = probe_stream_params(source)["video"]
+        if video is None:
+            raise ValueError("Video has no video stream")
+        presets = [p for p in presets if RESOLUTIONS[p][1] <= video["height"]]
+        if not presets:
+            raise ValueError("All presets are larger than the source")
+            
+        fps = probe_frame_rate(source)
+        base_path = base_path or str(Path(source).with_suffix(''))
+        keyint = self.profile.keyint(fps)
+        threads = max(1, self.profile.threads() // len(presets))
+        
+        outputs = "".join(f"[v{index}]" for index in range(len(presets)))
+        graph = [f"[0:v]split={len(presets)}{outputs}"]
+        for index, preset in enumerate(presets):
+            width, height = RESOLUTIONS[preset]
+            graph.append(f"[v{index}]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                         f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1[out{index}]")
+        args = ["-i", source, "-filter_complex", ";".join(graph)]
+        
+        paths = {}
+        for index, preset in enumerate(presets):
+            path = f"{base_path}_{preset}{Path(source).suffix}"
+            paths[preset] = path
+            max_bitrate = LADDER_MAX_BITRATES.get(preset)
+            args += [
+                "-map", f"[out{index}]", "-map", "0:a:0?",
+                "-c:v", "libx264", "-pix_fmt", "yuv420p",
+                *self.profile.ffmpeg_args(fps), "-threads", str(threads),
+                # Identical, scene-cut free GOP boundaries across renditions
+                "-keyint_min", str(keyint), "-sc_threshold", "0",
+                "-force_key_frames", f"expr:gte(t,n_forced*{keyint / fps:.6f})",
+            ]
+            if max_bitrate:
+                bitrate = int(max_bitrate.rstrip('k'))
+                args += ["-maxrate", max_bitrate, "-bufsize", f"{bitrate * 2}k"]
+            args += ["-c:a", "copy", "-movflags", "+faststart", path]
+        run_ffmpeg(args)
+        return paths
+        
+    def generate_thumbnails(self, tiles: int = SPRITE_TILES, columns: int = SPRITE_COLUMNS,
+                            tile_width: int = SPRITE_TILE_WIDTH,
+                            frames: Optional[Sequence[np.ndarray]] = None) -> Tuple[str, str]:
+        """Write a poster frame and a timeline sprite sheet next to the video.
+        
+        Only keyframes are decoded: each tile seeks straight to the keyframe
+        closest to the middle of its slice of the timeline and decodes that
+        frame alone. When the captured frames are still in memory (e.g. right
+        after recording) they are used instead, with the annotations drawn as
+        in the export, and the file is not decoded at all. Decoding and
+        resizing run in a thread pool.
+        
+        Args:
+            tiles: Number of sprite tiles, each covering duration / tiles seconds
+            columns: Tiles per sprite row
+            tile_width: Tile width in pixels (height follows the aspect ratio)
+            frames: Optional RGB frames of the video at self.fps
+        
+        Returns:
+            (poster path, sprite sheet path), i.e. <video>.poster.jpg and <video>.sprite.jpg
+        """
+        if not self.output_path:
+            raise ValueError("No video file to generate thumbnails for")
+            
+        if frames is not None:
+            if not len(frames):
+                raise ValueError("No frames to generate thumbnails from")
+            duration = len(frames) / self.fps
+            pick = lambda time: min(len(frames) - 1, int(time * self.fps))
+            load = lambda index: self.annotation_manager.draw_annotations(frames[index], index / self.fps)
+        else:
+            if not os.path.exists(self.output_path):
+                raise ValueError("No video file to generate thumbnails for")
+            video = probe_stream_params(self.output_path)["video"]
+            if video is None:
+                raise ValueError("Video has no video stream")
+            duration = probe_duration(self.output_path)
+            keyframes = load_keyframes(self.output_path) or [0.0]
+            pick = lambda time: min(range(len(keyframes)), key=lambda index: abs(keyframes[index] - time))
+            frame_size = (video["width"], video["height"])
+            load = lambda index: self._decode_keyframe(self.output_path, keyframes[index], frame_size)
+            
+        tile_times = [(index + 0.5) * duration / tiles for index in range(tiles)]
+        tile_frames = [pick(time) for time in tile_times]
+        poster_frame = pick(POSTER_POSITION * duration)
+        
+        def thumbnail(index):
+            frame = load(index)
+            if frame is None:
+                return None, None
+            height, width = frame.shape[:2]
+            tile_size = (tile_width, max(2, round(tile_width * height / width)))
+            tile = cv2.resize(frame, tile_size, interpolation=cv2.INTER_AREA)
+            poster = None
+            if index == poster_frame:
+                scale = min(1.0, POSTER_MAX_WIDTH / width)
+                poster = cv2.resize(frame, (round(width * scale), round(height * scale)),
+                                    interpolation=cv2.INTER_AREA)
+            return tile, poster
+            
+        wanted = sorted(set(tile_frames) | {poster_frame})
+        with ThreadPoolExecutor() as pool:
+            results = dict(zip(wanted, pool.map(thumbnail, wanted)))
+        resized = {index: tile for index, (tile, _) in results.items() if tile is not None}
+        poster = results[poster_frame][1]
+        if not resized or poster is None:
+            raise RuntimeError("Could not decode thumbnail frames")
+            
+        # Tiles whose keyframe could not be decoded reuse the previous one
+        tile_height = next(iter(resized.values())).shape[0]
+        rows = math.ceil(tiles / columns)
+        sprite = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+        last = next(iter(resized.values()))
+        for tile, index in enumerate(tile_frames):
+            last = resized.get(index, last)
+            row, column = divmod(tile, columns)
+            sprite[row * tile_height:(row + 1) * tile_height,
+                   column * tile_width:(column + 1) * tile_width] = last
+                   
+        stem = Path(self.output_path).with_suffix('')
+        poster_path = f"{stem}.poster.jpg"
+        sprite_path = f"{stem}.sprite.jpg"
+        cv2.imwrite(poster_path, cv2.cvtColor(poster, cv2.COLOR_RGB2BGR))
+        cv2.imwrite(sprite_path, cv2.cvtColor(sprite, cv2.COLOR_RGB2BGR))
+        return poster_path, sprite_path
+        
+    @staticmethod
+    def _decode_keyframe(path: str, time: float, frame_size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Seek to a keyframe and decode that frame alone."""
+        # Start slightly early so rounding cannot seek past the keyframe
+        frames = decode_frames(path, start=max(0.0, time - 0.001), frame_size=frame_size,
+                               extra_args=["-skip_frame", "nokey"])
+        try:
+            return next(frames, None)
+        finally:
+            frames.close()
+        
+    def generate_proxy(self, max_width: int = PROXY_WIDTH, low_priority: bool = True,
+                       progress_callback: Optional[Callable[[float], None]] = None) -> str:
+        """Write a low-resolution, short-GOP editing copy next to the video.
+        
+        The proxy keeps the frame timing of the video, so edit lists made
+        against it apply unchanged to the full-resolution file. Audio is
+        copied as is.
+        
+        Args:
+            max_width: Maximum proxy width (height follows the aspect ratio)
+            low_priority: Run ffmpeg below normal CPU priority
+            progress_callback: Optional function called with the finished
+                fraction; if it raises, encoding stops and no proxy is written
+        
+        Returns:
+            Path to the proxy (<video>.proxy.mp4)
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to make a proxy of")
+        video = probe_stream_params(self.output_path)["video"]
+        if video is None:
+            raise ValueError("Video has no video stream")
+        width, height = proxy_size(video["width"], video["height"], max_width)
+        fps = self._parse_rate(video["r_frame_rate"])
+        profile = get_encoding_profile(PROXY_PROFILE)
+        proxy_path = proxy_sidecar_path(self.output_path)
+        temp_path = os.path.join(self.temp_dir, os.path.basename(proxy_path))
+        duration = probe_duration(self.output_path) if progress_callback else None
+        try:
+            run_ffmpeg([
+                "-i", self.output_path,
+                "-map", "0:v:0", "-map", "0:a:0?",
+                "-vf", f"scale={width}:{height}:flags=area",
+                "-c:v", "libx264", "-pix_fmt", "yuv420p",
+                *profile.ffmpeg_args(fps), "-threads", str(profile.threads()),
+                "-c:a", "copy", "-movflags", "+faststart", temp_path
+            ], low_priority=low_priority, duration=duration, progress_callback=progress_callback)
+            shutil.move(temp_path, proxy_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return proxy_path
+        
+    def frame_server(self, use_proxy: bool = True, **kwargs) -> FrameServer:
+        """Open a cached, read-ahead frame server on the current video for scrubbing.
+        
+        Args:
+            use_proxy: Serve frames from the video's proxy when it has one
+            **kwargs: Options passed to FrameServer (cache_bytes, read_ahead, preview_width)
+        
+        Returns:
+            The frame server; call close() when done
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to serve frames from")
+        path = (find_proxy(self.output_path) if use_proxy else None) or self.output_path
+        return FrameServer(path, **kwargs)
+        
+    def begin_edit(self) -> EditDecisionList:
+        """Start a non-destructive edit of the current video.
+        
+        Trims, cuts, merges and annotations are recorded on the returned
+        edit list and nothing is written until render_edits() is called.
+        
+        Returns:
+            The edit decision list for the current video
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to edit")
+        self.edit_list = EditDecisionList(self.output_path)
+        return self.edit_list
+        
+    def render_edits(self, output_path: Optional[str] = None, preview: bool = False):
+        """Render the edit decision list in a single output pass.
+        
+        Spans without annotations whose source matches the output profile are
+        stream-copied (re-encoding only partial GOPs at their edges); spans
+        that carry annotations or come from mismatched sources are decoded,
+        drawn on and encoded once.
+        
+        The edit list always refers to the full-resolution sources. A
+        preview render reads their proxies instead, where they exist, with
+        annotations scaled to the proxy size.
+        
+        Args:
+            output_path: Path of the rendered file (defaults to <source>_edited,
+                or <source>_preview for previews)
+            preview: Render quickly from the proxies; the current video is not changed
+        
+        Returns:
+            Path to the rendered video file
+        """
+        if self.edit_list is None or not self.edit_list.clips:
+            raise ValueError("No edits to render")
+            
+        masters = list(dict.fromkeys(clip.source for clip in self.edit_list.clips))
+        media = {master: (find_proxy(master) if preview else None) or master for master in masters}
+        sources = list(dict.fromkeys(media.values()))
+        params = {source: probe_stream_params(source) for source in sources}
+        keys = {source: json.dumps(params[source], sort_keys=True) for source in sources}
+        # The profile covering most of the timeline is kept as is
+        weights = Counter()
+        for clip in self.edit_list.clips:
+            weights[keys[media[clip.source]]] += clip.duration
+        reference_key = weights.most_common(1)[0][0]
+        reference = json.loads(reference_key)
+        if reference["video"] is None:
+            raise ValueError("Edited videos have no video stream")
+            
+        keyframes = {}
+        frame_rates = {}
+        # Annotations are placed in master coordinates
+        annotation_scales = {}
+        for master, source in media.items():
+            if source != master:
+                master_width = probe_stream_params(master)["video"]["width"]
+                annotation_scales[source] = params[source]["video"]["width"] / master_width
+        if output_path is None:
+            path = Path(self.edit_list.clips[0].source)
+            suffix = "_preview" if preview else "_edited"
+            output_path = str(path.parent / f"{path.stem}{suffix}{path.suffix}")
+            
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        try:
+            pieces = []
+            for span in self.edit_list.plan():
+                source = media[span.source]
+                span = replace(span, source=source)
+                if source not in frame_rates:
+                    frame_rates[source] = probe_frame_rate(source)
+                fps = frame_rates[source]
+                start = round(span.start * fps) / fps
+                end = round(span.end * fps) / fps
+                if end - start <= 1e-3:
+                    continue
+                    
+                if span.needs_encode or keys[source] != reference_key:
+                    piece = os.path.join(work_dir, f"piece_{len(pieces):05d}.ts")
+                    self._render_span(span, start, end, reference, piece,
+                                      annotation_scale=annotation_scales.get(source, 1.0))
+                    pieces.append(piece)
+                else:
+                    if source not in keyframes:
+                        keyframes[source] = load_keyframes(source)
+                    pieces.extend(self._segment_pieces(source, keyframes[source], start, end, work_dir,
+                                                       len(pieces), params[source]))
+            self._concat_pieces(pieces, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            
+        if preview:
+            return output_path
+        self.output_path = output_path
+        return self.output_path
+        
+    def _render_span(self, span: PlannedSpan, start: float, end: float, reference: dict, piece: str,
+                     annotation_scale: float = 1.0):
+        """Decode, annotate and encode one span to the reference profile.
+        
+        Args:
+            span: Planned span to render
+            start: Frame-aligned start time in the source
+            end: Frame-aligned end time in the source
+            reference: Stream parameters as returned by probe_stream_params
+            piece: Path of the MPEG-TS piece to write
+            annotation_scale: Scale of the source relative to the video the
+                annotations were placed on (below 1 for proxies)
+        """
+        video = reference["video"]
+        audio = reference["audio"]
+        fps = self._parse_rate(video["r_frame_rate"])
+        duration = end - start
+        
+        frames = decode_frames(span.source, start, duration,
+                               size=(video["width"], video["height"]), fps=video["r_frame_rate"])
+        manager = AnnotationManager()
+        manager.annotations = [
+            annotation if annotation_scale == 1.0 else replace(
+                annotation,
+                position=tuple(round(v * annotation_scale) for v in annotation.position),
+                font_scale=annotation.font_scale * annotation_scale,
+                thickness=max(1, round(annotation.thickness * annotation_scale))
+            )
+            for annotation in span.annotations
+        ]
+        annotated_frames = (
+            manager.draw_annotations(frame, span.offset + index / fps)
+            for index, frame in enumerate(frames)
+        )
+        
+        audio_input = audio_output = None
+        if audio:
+            if probe_stream_params(span.source)["audio"] is not None:
+                audio_input = ["-ss", f"{start:.6f}", "-t", f"{duration:.6f}", "-i", span.source]
+            else:
+                # Keep the stream layout identical by adding silence
+                layout = "mono" if audio["channels"] == 1 else "stereo"
+                audio_input = ["-f", "lavfi", "-t", f"{duration:.6f}",
+                               "-i", f"anullsrc=r={audio['sample_rate']}:cl={layout}"]
+            audio_output = [
+                "-c:a", CONFORM_ENCODERS.get(audio["codec_name"], "aac"),
+                "-ar", str(audio["sample_rate"]), "-ac", str(audio["channels"])
+            ]
+            
+        codec = CONFORM_ENCODERS.get(video["codec_name"], "libx264")
+        encoder = FFmpegPipeEncoder(
+            piece, fps=fps, codec=codec, profile=self.profile if codec == "libx264" else None,
+            audio_input=audio_input, audio_output=audio_output
+        )
+        if encoder.encode(annotated_frames) == 0:
+            raise RuntimeError(f"No frames decoded from {span.source} at {start:.3f}s")
+        
+    def export_parallel(self, output_path: Optional[str] = None, workers: Optional[int] = None,
+                        chunk_seconds: float = EXPORT_CHUNK_SECONDS, codec: str = "libx264",
+                        threads_per_chunk: int = 2, encoder_args: Optional[List[str]] = None):
+        """Re-encode the video using a pool of worker processes.
+        
+        The timeline is split at source keyframes into chunks of about
+        chunk_seconds; each chunk is decoded and encoded independently (so
+        every chunk starts a closed GOP) and the results are joined by stream
+        copy. The audio stream is copied from the source in the final mux.
+        
+        Args:
+            output_path: Path of the exported file (defaults to <source>_export)
+            workers: Number of chunks encoded at once (defaults to CPU count / threads_per_chunk)
+            chunk_seconds: Minimum chunk length in seconds
+            codec: Video encoder passed to ffmpeg
+            threads_per_chunk: Encoder threads used by each chunk
+            encoder_args: Extra ffmpeg output options for the video encoder (e.g. ["-crf", "20"]);
+                None uses the encoding profile when encoding with libx264
+        
+        Returns:
+            Path to the exported video file
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to export")
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 1) // threads_per_chunk)
+            
+        source = self.output_path
+        fps = probe_frame_rate(source)
+        duration = probe_duration(source)
+        chunks = group_keyframes(load_keyframes(source), duration, chunk_seconds)
+        if encoder_args is None:
+            encoder_args = self.profile.ffmpeg_args(fps) if codec == "libx264" else []
+        
+        if output_path is None:
+            path = Path(source)
+            output_path = str(path.parent / f"{path.stem}_export{path.suffix}")
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        try:
+            pieces = [os.path.join(work_dir, f"chunk_{index:05d}.ts") for index in range(len(chunks))]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_encode_chunk, source, start,
+                                max(1, round(end * fps) - round(start * fps)),
+                                codec, threads_per_chunk, list(encoder_args), piece)
+                    for (start, end), piece in zip(chunks, pieces)
+                ]
+                try:
+                    for future in futures:
+                        future.result()
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+            self._join_chunks(pieces, source, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        self.output_path = output_path
+        return self.output_path
+        
+    def transcode(self, output_path: str, profile: Optional[str] = None,
+                  chunk_seconds: float = EXPORT_CHUNK_SECONDS, low_priority: bool = True,
+                  resume_event: Optional[threading.Event] = None,
+                  progress_callback: Optional[Callable[[float], None]] = None):
+        """Re-encode the video chunk by chunk, e.g. from a fast capture intermediate.
+        
+        Chunks are encoded one after another at low CPU priority. Before each
+        chunk the resume event is waited on, so clearing it pauses the job at
+        the next chunk boundary.
+        
+        Args:
+            output_path: Path of the transcoded file
+            profile: Encoding profile name (defaults to this processor's profile)
+            chunk_seconds: Minimum chunk length in seconds
+            low_priority: Run ffmpeg below normal CPU priority
+            resume_event: Optional event that must be set for encoding to proceed
+            progress_callback: Optional function called with the finished fraction
+        
+        Returns:
+            Path to the transcoded video file
+        """
+        if not self.output_path or not os.path.exists(self.output_path):
+            raise ValueError("No video file to transcode")
+            
+        encoding_profile = get_encoding_profile(profile) if profile else self.profile
+        source = self.output_path
+        fps = probe_frame_rate(source)
+        duration = probe_duration(source)
+        chunks = group_keyframes(load_keyframes(source), duration, chunk_seconds)
+        
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        try:
+            pieces = []
+            for index, (start, end) in enumerate(chunks):
+                if resume_event is not None:
+                    resume_event.wait()
+                piece = os.path.join(work_dir, f"chunk_{index:05d}.ts")
+                pieces.append(piece)
+                _encode_chunk(source, start, max(1, round(end * fps) - round(start * fps)),
+                              "libx264", encoding_profile.threads(), encoding_profile.ffmpeg_args(fps),
+                              piece, low_priority=low_priority)
+                if progress_callback:
+                    progress_callback(end / duration)
+            self._join_chunks(pieces, source, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        self.output_path = output_path
+        return self.output_path
+        
+    def _join_chunks(self, pieces: List[str], source: str, output_path: str):
+        """Concatenate encoded video chunks and mux the source audio by stream copy."""
+        list_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        list_path = os.path.join(list_dir, "concat.txt")
+        with open(list_path, "w") as f:
+            for piece in pieces:
+                f.write(f"file '{piece}'\n")
+        try:
+            run_ffmpeg([
+                "-f", "concat", "-safe", "0", "-i", list_path, "-i", source,
+                "-map", "0:v:0", "-map", "1:a:0?",
+                "-c", "copy", "-movflags", "+faststart",
+                output_path
+            ])
+        finally:
+            shutil.rmtree(list_dir, ignore_errors=True)
+        
+    def _conform_piece(self, source: str, reference: dict, piece: str):
+        """Re-encode a file to the codec parameters of a reference stream set.
+        
+        Args:
+            source: Path to the mismatched video
+            reference: Stream parameters as returned by probe_stream_params
+            piece: Path of the MPEG-TS piece to write
+        """
+        video = reference["video"]
+        audio = reference["audio"]
+        width, height = video["width"], video["height"]
+        args = ["-i", source]
+        source_has_audio = probe_stream_params(source)["audio"] is not None
+        if audio and not source_has_audio:
+            # Keep the stream layout identical by adding silence
+            layout = "mono" if audio["channels"] == 1 else "stereo"
+            args += ["-f", "lavfi", "-i", f"anullsrc=r={audio['sample_rate']}:cl={layout}"]
+            
+        codec = CONFORM_ENCODERS.get(video["codec_name"], "libx264")
+        args += [
+            "-map", "0:v:0",
+            "-vf", (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                    f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={video['r_frame_rate']}"),
+            "-c:v", codec,
+            "-pix_fmt", video["pix_fmt"],
+        ]
+        if codec == "libx264":
+            args += self._profile_args(self._parse_rate(video["r_frame_rate"]))
+        if audio:
+            args += [
+                "-map", "0:a:0" if source_has_audio else "1:a:0",
+                "-c:a", CONFORM_ENCODERS.get(audio["codec_name"], "aac"),
+                "-ar", str(audio["sample_rate"]), "-ac", str(audio["channels"]),
+                "-shortest"
+            ]
+        args += [*self._annexb_args(video["codec_name"]), "-f", "mpegts", piece]
+        run_ffmpeg(args)
+        
+    def _profile_args(self, fps: float) -> List[str]:
+        """Get the ffmpeg libx264 options of the encoding profile, including threads."""
+        return [*self.profile.ffmpeg_args(fps), "-threads", str(self.profile.threads())]
+        
+    @staticmethod
+    def _parse_rate(rate: str) -> float:
+        """Convert an ffprobe rate such as "30000/1001" to frames per second."""
+        numerator, _, denominator = rate.partition("/")
+        return float(numerator) / float(denominator or 1)
+        
+    def _render_ranges(self, source: str, ranges: List[Tuple[float, float]], output_path: str,
+                       progress_callback: Optional[Callable[[float], None]] = None):
+        """Write the given time ranges of a file back to back into a new file.
+        
+        Args:
+            source: Path to the source video
+            ranges: List of (start, end) ranges in seconds to keep, in order
+            output_path: Path of the resulting file
+            progress_callback: Optional function called with the finished
+                fraction after each range, before the pieces are joined
+        """
+        keyframes = load_keyframes(source)
+        params = probe_stream_params(source)
+        total = sum(end - start for start, end in ranges)
+        done = 0.0
+        work_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        try:
+            pieces = []
+            for start, end in ranges:
+                pieces.extend(self._segment_pieces(source, keyframes, start, end, work_dir,
+                                                   len(pieces), params))
+                done += end - start
+                if progress_callback:
+                    progress_callback(done / total if total > 0 else 1.0)
+            self._concat_pieces(pieces, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+    def _segment_pieces(self, source: str, keyframes: List[float], start: float, end: float,
+                        work_dir: str, index: int, params: Optional[dict] = None) -> List[str]:
+        """Cut one range into stream-copied and re-encoded MPEG-TS pieces.
+        
+        The partial GOPs at the edges are re-encoded with the codec, profile
+        and pixel format of the source. When those cannot be reproduced, the
+        whole range is re-encoded instead, so every piece still matches.
+        
+        Args:
+            source: Path to the source video
+            keyframes: Sorted keyframe times of the source
+            start: Range start in seconds
+            end: Range end in seconds
+            work_dir: Directory of the calling operation to write the pieces to
+            index: Number of pieces already written, used for naming
+            params: Stream parameters of the source (probed when omitted)
+        
+        Returns:
+            Paths of the pieces in playback order
+        """
+        if params is None:
+            params = probe_stream_params(source)
+        fps = probe_frame_rate(source)
+        edge_args = self._edge_encoder_args(params, fps)
+        span = keyframe_span(keyframes, start, end) if edge_args else None
+        if span is None:
+            parts = [(start, end, False)]
+        else:
+            first, last = span
+            parts = [(start, first, False), (first, last, True), (last, end, False)]
+        if edge_args is None:
+            # Every range of the source takes this path, so the pieces agree
+            edge_args = ["-c:v", "libx264", "-pix_fmt", "yuv420p", *self._profile_args(fps),
+                         "-c:a", "aac", *self._annexb_args("h264")]
+            
+        pieces = []
+        for part_start, part_end, copy in parts:
+            if part_end - part_start <= 1e-3:
+                continue
+            piece = os.path.join(work_dir, f"piece_{index + len(pieces):05d}.ts")
+            if copy:
+                self._copy_gops(source, part_start, part_end, piece, params)
+            else:
+                run_ffmpeg([
+                    "-ss", f"{part_start:.6f}", "-i", source, "-t", f"{part_end - part_start:.6f}",
+                    *edge_args, "-f", "mpegts", piece
+                ])
+            pieces.append(piece)
+        return pieces
+        
+    def _edge_encoder_args(self, params: dict, fps: float) -> Optional[List[str]]:
+        """Get encoder options that reproduce the streams of a source.
+        
+        Re-encoded edges are joined to stream-copied GOPs, so their codec,
+        profile and pixel format must be those of the source.
+        
+        Args:
+            params: Stream parameters as returned by probe_stream_params
+            fps: Frame rate of the source
+        
+        Returns:
+            ffmpeg output options, or None when the source has no matching encoder
+        """
+        video, audio = params["video"], params["audio"]
+        if video is None:
+            return None
+        codec = CONFORM_ENCODERS.get(video["codec_name"])
+        if codec not in ("libx264", "libx265"):
+            return None
+        if audio and audio["codec_name"] not in CONFORM_ENCODERS:
+            return None
+        args = ["-c:v", codec, "-pix_fmt", video["pix_fmt"]]
+        profile = ENCODER_PROFILES.get(video.get("profile"))
+        if profile:
+            args += ["-profile:v", profile]
+        if codec == "libx264":
+            args += self._profile_args(fps)
+        if audio:
+            args += [
+                "-c:a", CONFORM_ENCODERS[audio["codec_name"]],
+                "-ar", str(audio["sample_rate"]), "-ac", str(audio["channels"])
+            ]
+        return args + self._annexb_args(video["codec_name"])
+        
+    @staticmethod
+    def _annexb_args(codec_name: str) -> List[str]:
+        """Get the bitstream filter options for writing a video codec to MPEG-TS."""
+        bsf = ANNEXB_FILTERS.get(codec_name)
+        return ["-bsf:v", bsf] if bsf else []
+        
+    def _copy_gops(self, source: str, start: float, end: float, piece: str,
+                   params: Optional[dict] = None):
+        """Stream-copy the whole GOPs between two keyframes into an MPEG-TS piece.
+        
+        A plain -t cut with stream copy stops on decode timestamps and can
+        leak the next keyframe into the piece, so the segment muxer is used to
+        split exactly at the keyframe that starts the next GOP.
+        
+        Args:
+            source: Path to the source video
+            start: Time of the keyframe that starts the piece
+            end: Time of the keyframe that starts the next piece
+            piece: Path of the MPEG-TS piece to write
+            params: Stream parameters of the source (probed when omitted)
+        """
+        if params is None:
+            params = probe_stream_params(source)
+        split_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        pattern = os.path.join(split_dir, "gops_%d.ts")
+        try:
+            run_ffmpeg([
+                "-ss", f"{start:.6f}", "-i", source,
+                # Read a little past the end so the split keyframe is seen
+                "-t", f"{end - start + GOP_COPY_MARGIN:.6f}",
+                "-c", "copy", *self._annexb_args(params["video"]["codec_name"]),
+                "-f", "segment", "-segment_format", "mpegts",
+                "-segment_times", f"{end - start:.6f}",
+                "-reset_timestamps", "1",
+                pattern
+            ])
+            os.replace(pattern % 0, piece)
+        finally:
+            shutil.rmtree(split_dir, ignore_errors=True)
+        
+    def _concat_pieces(self, pieces: List[str], output_path: str):
+        """Join MPEG-TS pieces into one file using stream copy."""
+        # ADTS headers must become MP4 config, which only applies to AAC
+        audio = probe_stream_params(pieces[0])["audio"] if pieces else None
+        audio_filter = ["-bsf:a", "aac_adtstoasc"] if audio and audio["codec_name"] == "aac" else []
+        list_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        list_path = os.path.join(list_dir, "concat.txt")
+        with open(list_path, "w") as f:
+            for piece in pieces:
+                f.write(f"file '{piece}'\n")
+        try:
+            run_ffmpeg([
+                "-f", "concat", "-safe", "0", "-i", list_path,
+                "-c", "copy", *audio_filter,
+                "-movflags", "+faststart",
+                output_path
+            ])
+        finally:
+            shutil.rmtree(list_dir, ignore_errors=True)
+        
     def add_annotation(self, text: str, position: tuple, **kwargs):
         """Add a text annotation to the video.
         
@@ -0,0 +1,249 @@
+import os
+import struct
+import subprocess
+import numpy as np
+from typing import List, Optional
+from utils.media_utils import probe_stream_params
+from utils.wav_utils import convert_samples
+
+# One entry per bucket: extremes over all channels and the RMS of all samples
+WAVEFORM_DTYPE = np.dtype([("min", "<f4"), ("max", "<f4"), ("rms", "<f4")])
+
+# Samples per bucket of the finest level; each further level doubles it
+WAVEFORM_BUCKET_SAMPLES = 256
+
+# Sidecar header: magic, version, sample rate, bucket samples, level count,
+# total samples; followed by one uint64 bucket count per level, then the levels
+WAVEFORM_MAGIC = b"WFPM"
+WAVEFORM_VERSION = 1
+WAVEFORM_HEADER = struct.Struct("<4sIIIIQ")
+
+# Samples decoded at a time when building the pyramid of an existing file
+WAVEFORM_READ_FRAMES = 65536
+
+def waveform_sidecar_path(media_path: str) -> str:
+    """Get the sidecar path that stores the waveform pyramid of a recording."""
+    return os.path.splitext(media_path)[0] + ".waveform"
+
+class WaveformBuilder:
+    def __init__(self, sample_rate: int, channels: int, bucket_samples: int = WAVEFORM_BUCKET_SAMPLES):
+        """Initialize an incremental waveform builder.
+
+        Blocks are reduced to min/max/RMS buckets as they arrive, so only
+        the bucket data is kept in memory. The coarser levels are derived
+        from the finest one in finish().
+
+        Args:
+            sample_rate: Sample rate in Hz
+            channels: Number of channels
+            bucket_samples: Samples per bucket of the finest level
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bucket_samples = bucket_samples
+        self.samples = 0
+        self._buckets: List[np.ndarray] = []
+        self._carry = np.zeros((0, channels), dtype=np.float32)
+
+    def process(self, block: np.ndarray):
+        """Add one block of audio samples."""
+        x = convert_samples(np.asarray(block).reshape(len(block), -1), np.float32)
+        self.samples += len(x)
+        if len(self._carry):
+            x = np.concatenate([self._carry, x])
+        full = len(x) // self.bucket_samples * self.bucket_samples
+        if full:
+            self._buckets.append(_reduce(x[:full].reshape(-1, self.bucket_samples * self.channels)))
+        self._carry = x[full:].copy()
+
+    def finish(self) -> "Waveform":
+        """Close the last, partial bucket and build the pyramid."""
+        buckets = list(self._buckets)
+        if len(self._carry):
+            buckets.append(_reduce(self._carry.reshape(1, -1)))
+        level = np.concatenate(buckets) if buckets else np.zeros(0, dtype=WAVEFORM_DTYPE)
+        levels = [level]
+        while len(level) > 1:
+            level = _downsample(level)
+            levels.append(level)
+        return Waveform(levels, self.sample_rate, self.bucket_samples, self.samples)
+
+def _reduce(rows: np.ndarray) -> np.ndarray:
+    """Reduce each row of samples to one bucket."""
+    buckets = np.empty(len(rows), dtype=WAVEFORM_DTYPE)
+    buckets["min"] = rows.min(axis=1)
+    buckets["max"] = rows.max(axis=1)
+    buckets["rms"] = np.sqrt(np.einsum("ij,ij->i", rows, rows, dtype=np.float64) / rows.shape[1])
+    return buckets
+
+def _downsample(level: np.ndarray) -> np.ndarray:
+    """Merge pairs of buckets into the next coarser level."""
+    pairs = len(level) // 2
+    first, second = level[0:2 * pairs:2], level[1:2 * pairs:2]
+    merged = np.empty(pairs + len(level) % 2, dtype=WAVEFORM_DTYPE)
+    merged["min"][:pairs] = np.minimum(first["min"], second["min"])
+    merged["max"][:pairs] = np.maximum(first["max"], second["max"])
+    merged["rms"][:pairs] = np.sqrt((np.square(first["rms"], dtype=np.float64)
+                                     + np.square(second["rms"], dtype=np.float64)) / 2)
+    if len(level) % 2:
+        merged[-1] = level[-1]
+    return merged
+
+class Waveform:
+    def __init__(self, levels: List[np.ndarray], sample_rate: int, bucket_samples: int, samples: int):
+        """Initialize a waveform pyramid.
+
+        Args:
+            levels: Bucket arrays of WAVEFORM_DTYPE, finest first; level k
+                has bucket_samples * 2**k samples per bucket
+            sample_rate: Sample rate in Hz
+            bucket_samples: Samples per bucket of the finest level
+            samples: Total number of samples
+        """
+        self.levels = levels
+        self.sample_rate = sample_rate
+        self.bucket_samples = bucket_samples
+        self.samples = samples
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate if self.sample_rate else 0.0
+
+    @classmethod
+    def build(cls, media_path: str, bucket_samples: int = WAVEFORM_BUCKET_SAMPLES) -> "Waveform":
+        """Build the pyramid of an existing file in one streaming pass.
+
+        Args:
+            media_path: Audio or video file
+            bucket_samples: Samples per bucket of the finest level
+        """
+        audio = probe_stream_params(media_path)["audio"]
+        if audio is None:
+            raise ValueError(f"No audio stream in {media_path}")
+        sample_rate, channels = int(audio["sample_rate"]), int(audio["channels"])
+        builder = WaveformBuilder(sample_rate, channels, bucket_samples)
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin",
+                   "-i", media_path, "-map", "0:a:0", "-f", "f32le", "-acodec", "pcm_f32le", "pipe:"]
+        read_bytes = WAVEFORM_READ_FRAMES * channels * 4
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                data = process.stdout.read(read_bytes)
+                if not data:
+                    break
+                samples = np.frombuffer(data[:len(data) // (channels * 4) * channels * 4], dtype="<f4")
+                builder.process(samples.reshape(-1, channels))
+        finally:
+            process.stdout.close()
+            error = process.stderr.read().decode(errors="replace").strip()
+            process.stderr.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"FFmpeg error: {error}")
+        return builder.finish()
+
+    @classmethod
+    def for_media(cls, media_path: str, write: bool = True) -> "Waveform":
+        """Get the pyramid of a file from its sidecar, building and saving it if missing.
+
+        Args:
+            media_path: Audio or video file
+            write: Save a newly built pyramid as a sidecar
+        """
+        path = waveform_sidecar_path(media_path)
+        waveform = cls.load(path)
+        if waveform is None:
+            waveform = cls.build(media_path)
+            if write:
+                try:
+                    waveform.save(path)
+                except OSError as e:
+                    print(f"Could not write waveform: {e}")
+        return waveform
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Waveform"]:
+        """Memory-map a sidecar; only the pages a render touches are read.
+
+        Returns:
+            The pyramid, or None if the sidecar is missing or corrupt
+        """
+        try:
+            with open(path, "rb") as f:
+                header = f.read(WAVEFORM_HEADER.size)
+                if len(header) < WAVEFORM_HEADER.size:
+                    return None
+                magic, version, sample_rate, bucket_samples, level_count, samples = WAVEFORM_HEADER.unpack(header)
+                if magic != WAVEFORM_MAGIC or version != WAVEFORM_VERSION:
+                    return None
+                counts = np.fromfile(f, dtype="<u8", count=level_count)
+            if len(counts) != level_count:
+                return None
+            offset = WAVEFORM_HEADER.size + counts.nbytes
+            if os.path.getsize(path) < offset + int(counts.sum()) * WAVEFORM_DTYPE.itemsize:
+                return None
+            levels = []
+            for count in counts:
+                if count:
+                    levels.append(np.memmap(path, dtype=WAVEFORM_DTYPE, mode="r",
+                                            offset=offset, shape=(int(count),)))
+                else:
+                    levels.append(np.zeros(0, dtype=WAVEFORM_DTYPE))
+                offset += int(count) * WAVEFORM_DTYPE.itemsize
+        except (OSError, ValueError):
+            return None
+        return cls(levels, sample_rate, bucket_samples, samples)
+
+    def save(self, path: str) -> str:
+        """Write the pyramid as a binary sidecar atomically.
+
+        Returns:
+            Path to the sidecar file
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(WAVEFORM_HEADER.pack(WAVEFORM_MAGIC, WAVEFORM_VERSION, self.sample_rate,
+                                         self.bucket_samples, len(self.levels), self.samples))
+            np.array([len(level) for level in self.levels], dtype="<u8").tofile(f)
+            for level in self.levels:
+                np.ascontiguousarray(level).tofile(f)
+        os.replace(temp_path, path)
+        return path
+
+    def render(self, start: float, end: float, width: int) -> np.ndarray:
+        """Get the waveform of a time range for display.
+
+        The coarsest level with at least one bucket per pixel is read, so
+        the work depends on the width, not on the length of the range.
+
+        Args:
+            start: Start time in seconds
+            end: End time in seconds
+            width: Number of pixels
+
+        Returns:
+            Array of WAVEFORM_DTYPE with one entry per pixel (fewer when
+            zoomed in past the finest level)
+        """
+        if width <= 0 or end <= start or not self.levels or not len(self.levels[0]):
+            return np.zeros(0, dtype=WAVEFORM_DTYPE)
+        samples_per_pixel = (end - start) * self.sample_rate / width
+        level_index = 0
+        while (level_index + 1 < len(self.levels)
+               and self.bucket_samples * 2 ** (level_index + 1) <= samples_per_pixel):
+            level_index += 1
+        level = self.levels[level_index]
+        bucket_seconds = self.bucket_samples * 2 ** level_index / self.sample_rate
+        first = min(len(level) - 1, max(0, int(start / bucket_seconds)))
+        last = min(len(level), max(first + 1, int(np.ceil(end / bucket_seconds))))
+        buckets = np.asarray(level[first:last])
+        if len(buckets) <= width:
+            return buckets.copy()
+
+        edges = np.linspace(0, len(buckets), width + 1).astype(np.intp)[:-1]
+        pixels = np.empty(width, dtype=WAVEFORM_DTYPE)
+        pixels["min"] = np.minimum.reduceat(buckets["min"], edges)
+        pixels["max"] = np.maximum.reduceat(buckets["max"], edges)
+        counts = np.diff(np.append(edges, len(buckets)))
+        squares = np.add.reduceat(np.square(buckets["rms"], dtype=np.float64), edges)
+        pixels["rms"] = np.sqrt(squares / counts)
+        return pixels